@@ -1,10 +1,21 @@
 import os
-import logging
 from typing import Optional, Dict, Any
-from flask import Flask, request
-from extensions import db, migrate, jwt, swagger
+from flask import Flask
+from extensions import db, migrate, jwt, socketio, swagger
 from flask_cors import CORS
 from commands import seed_db_command
+from cache import init_membership_cache, init_profile_cache
+from notifier import init_notifier
+from db_pool import build_engine_options
+from tokens import init_token_versions
+from passwords import init_password_hasher
+from instrumentation import init_instrumentation
+from request_logging import configure_logging, init_request_logging
+from metrics import init_metrics
+from compression import init_compression
+from json_provider import init_json_provider
+# Importing registers the Socket.IO event handlers before socketio.init_app runs.
+import realtime  # noqa: F401
 
 def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     """
@@ -13,19 +24,88 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     """
     app = Flask(__name__, instance_relative_config=True)
 
-    # Setup Logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[logging.StreamHandler()]
-    )
-
     # Configuration
     app.config.from_mapping(
         SECRET_KEY='dev',
         SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///local.db'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         JWT_SECRET_KEY=os.environ.get('JWT_SECRET_KEY', 'super-secret-key-change-this'),
+        # Optional broker URL (e.g. redis://redis:6379/0) so that events emitted
+        # by one server process reach sockets connected to another.
+        SOCKETIO_MESSAGE_QUEUE=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+        # threading / eventlet / gevent. Must match the server's worker model:
+        # gunicorn.conf.py sets it for the worker class it runs, and the
+        # development server (flask run) is threaded.
+        SOCKETIO_ASYNC_MODE=os.environ.get('SOCKETIO_ASYNC_MODE', 'threading'),
+        # Per-process (user_id, chat_id) -> allowed cache for chat authorization.
+        MEMBERSHIP_CACHE_SIZE=int(os.environ.get('MEMBERSHIP_CACHE_SIZE', 10000)),
+        MEMBERSHIP_CACHE_TTL=int(os.environ.get('MEMBERSHIP_CACHE_TTL', 300)),
+        # Group chat entries (membership changes at any time): how long another
+        # worker may keep letting a removed member in, in seconds.
+        MEMBERSHIP_GROUP_CACHE_TTL=float(os.environ.get('MEMBERSHIP_GROUP_CACHE_TTL', 5)),
+        # Read-through cache of public user profiles (see cache.py): 'local' or 'redis'.
+        PROFILE_CACHE_BACKEND=os.environ.get('PROFILE_CACHE_BACKEND', 'local'),
+        PROFILE_CACHE_URL=os.environ.get('PROFILE_CACHE_URL', 'redis://localhost:6379/0'),
+        PROFILE_CACHE_SIZE=int(os.environ.get('PROFILE_CACHE_SIZE', 10000)),
+        PROFILE_CACHE_TTL=int(os.environ.get('PROFILE_CACHE_TTL', 300)),
+        # Per-process user_id -> token_version cache for token revocation checks.
+        TOKEN_VERSION_CACHE_SIZE=int(os.environ.get('TOKEN_VERSION_CACHE_SIZE', 10000)),
+        TOKEN_VERSION_CACHE_TTL=int(os.environ.get('TOKEN_VERSION_CACHE_TTL', 60)),
+        # Password hashing (see passwords.py). Werkzeug method string, e.g.
+        # 'scrypt', 'scrypt:65536:8:1' or 'pbkdf2:sha256:600000'. Hashes made with
+        # other settings are upgraded on the user's next successful login.
+        PASSWORD_HASH_METHOD=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        # Hashing threads per process, and how many more logins may queue
+        # behind them before new attempts get 503.
+        PASSWORD_HASH_WORKERS=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        PASSWORD_HASH_MAX_PENDING=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32)),
+        # Hard server-side cap on messages returned by one page (history or polling).
+        MESSAGES_PAGE_MAX=int(os.environ.get('MESSAGES_PAGE_MAX', 100)),
+        # Chats accepted by one POST /api/sync (each costs one UNION ALL branch).
+        SYNC_MAX_CHATS=int(os.environ.get('SYNC_MAX_CHATS', 200)),
+        # Chat list page size (default and hard cap).
+        CHATS_PAGE_SIZE=int(os.environ.get('CHATS_PAGE_SIZE', 50)),
+        CHATS_PAGE_MAX=int(os.environ.get('CHATS_PAGE_MAX', 100)),
+        # Group chats: member cap per group and page cap for the member list.
+        GROUP_MAX_MEMBERS=int(os.environ.get('GROUP_MAX_MEMBERS', 10000)),
+        MEMBERS_PAGE_MAX=int(os.environ.get('MEMBERS_PAGE_MAX', 500)),
+        # Message search (see search.py): page cap, and how many of the newest
+        # matches are ranked (bounds the cost of very common words).
+        SEARCH_PAGE_MAX=int(os.environ.get('SEARCH_PAGE_MAX', 50)),
+        SEARCH_RANK_WINDOW=int(os.environ.get('SEARCH_RANK_WINDOW', 1000)),
+        # Cache lifetime (seconds) of older history pages (before_id); after it
+        # clients revalidate with If-None-Match (see conditional.py).
+        HISTORY_MAX_AGE=int(os.environ.get('HISTORY_MAX_AGE', 86400)),
+        # Response compression (see compression.py): encodings offered in order of
+        # preference ('br' needs the brotli package; empty disables), and the
+        # smallest body worth compressing, in bytes.
+        COMPRESSION_ALGORITHMS=os.environ.get('COMPRESSION_ALGORITHMS', 'br,gzip'),
+        COMPRESSION_MIN_SIZE=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+        COMPRESSION_GZIP_LEVEL=int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+        COMPRESSION_BROTLI_QUALITY=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+        # JSON encoder behind jsonify: auto (orjson if installed), orjson or default.
+        JSON_PROVIDER=os.environ.get('JSON_PROVIDER', 'auto'),
+        # Upper bound for the `wait` (long polling) parameter, in seconds.
+        LONG_POLL_MAX_WAIT=float(os.environ.get('LONG_POLL_MAX_WAIT', 30)),
+        # Connection pool (server databases only, see db_pool.py).
+        # Total connections = workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+        DB_POOL_SIZE=int(os.environ.get('DB_POOL_SIZE', 10)),
+        DB_MAX_OVERFLOW=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        DB_POOL_TIMEOUT=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        DB_POOL_RECYCLE=int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        DB_POOL_PRE_PING=os.environ.get('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'yes'),
+        # Per-request timing (see instrumentation.py). Server-Timing reveals DB
+        # timings to clients; turn it off if that matters for your deployment.
+        SERVER_TIMING=os.environ.get('SERVER_TIMING', '1').lower() in ('1', 'true', 'yes'),
+        # Log statements slower than this many milliseconds (with parameters). Off when unset.
+        SLOW_QUERY_MS=float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None,
+        # Logging (see request_logging.py): 'json' lines or plain 'text'.
+        LOG_FORMAT=os.environ.get('LOG_FORMAT', 'json'),
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'INFO'),
+        # Records buffered for the background writer; beyond this they are dropped, not waited on.
+        LOG_QUEUE_SIZE=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+        # Fraction of successful after_id polls that get a request log line.
+        LOG_POLL_SAMPLE_RATE=float(os.environ.get('LOG_POLL_SAMPLE_RATE', 1.0)),
         SWAGGER={
             'title': 'Flask-React Messenger API',
             'uiversion': 3,
@@ -48,42 +128,69 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     else:
         app.config.from_mapping(test_config)
 
+    # Setup Logging
+    configure_logging(app.config)
+
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS in config take precedence over DB_POOL_*
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
+
     # CORS Setup
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": "*"}},
+        expose_headers=['X-Has-More', 'X-Next-Cursor', 'Server-Timing', 'X-Request-ID', 'ETag']
+    )
 
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
 
+    init_json_provider(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     swagger.init_app(app)
+    socketio.init_app(
+        app,
+        cors_allowed_origins='*',
+        # Always passed: init_app keeps options between calls on the shared instance
+        client_manager=realtime.make_client_manager(app.config.get('SOCKETIO_MESSAGE_QUEUE')),
+        async_mode=app.config.get('SOCKETIO_ASYNC_MODE')
+    )
+    init_membership_cache(app)
+    init_profile_cache(app)
+    init_token_versions(app)
+    init_password_hasher(app)
+    init_notifier(app)
+    init_instrumentation(app)
+    init_metrics(app)
 
     # Register Blueprints
     from auth import bp as auth_bp
     app.register_blueprint(auth_bp)
 
-    # Import both blueprints from chat.py
-    from chat import chat_bp, message_bp
+    # Import the blueprints from chat.py
+    from chat import chat_bp, message_bp, sync_bp
     app.register_blueprint(chat_bp)
     app.register_blueprint(message_bp)
+    app.register_blueprint(sync_bp)
 
     from users import bp as users_bp
     app.register_blueprint(users_bp)
 
+    from metrics import bp as metrics_bp
+    app.register_blueprint(metrics_bp)
+
     with app.app_context():
         from models import User
 
     # Request Logging Hook
-    @app.after_request
-    def log_request_info(response):
-        app.logger.info(
-            f"Request: {request.method} {request.path} | Status: {response.status_code}"
-        )
-        return response
+    init_request_logging(app)
+    # Registered last so it runs first among after_request hooks (timed with the request)
+    init_compression(app)
 
     @app.route('/hello')
     def hello():
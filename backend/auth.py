@@ -1,13 +1,22 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import jwt_required
 from app import db
 from models import User
+from passwords import PasswordHasherBusy, get_password_hasher
+from realtime import disconnect_user
+from tokens import get_current_user, invalidate_token_version, issue_access_token
 
 # Create a Blueprint for authentication routes.
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
+def hashing_busy():
+    # Login storm: fail fast and let the client retry instead of queueing.
+    response = jsonify({'error': 'Too many login attempts, try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @bp.route('/register', methods=['POST'])
 def register():
     """
@@ -42,6 +51,8 @@ def register():
         description: Missing required fields
       409:
         description: User already exists
+      503:
+        description: Password hashing is saturated, retry later
     """
     data = request.get_json()
 
@@ -59,7 +70,12 @@ def register():
         return jsonify({'error': 'User already exists'}), 409
 
     # Security: Never store passwords in plain text.
-    hashed_password = generate_password_hash(password)
+    # Hand the connection back to the pool while the hash is computed.
+    db.session.close()
+    try:
+        hashed_password = get_password_hasher().hash(password)
+    except PasswordHasherBusy:
+        return hashing_busy()
 
     new_user = User(
         username=username,
@@ -120,6 +136,8 @@ def login():
                   type: string
       401:
         description: Invalid credentials
+      503:
+        description: Password hashing is saturated, retry later
     """
     data = request.get_json()
     email = data.get('email')
@@ -132,13 +150,37 @@ def login():
     # Find user by email
     user = User.query.filter_by(email=email).first()
 
-    # Verify user exists and password matches hash
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user:
         return jsonify({'error': 'Invalid email or password'}), 401
 
+    # Hand the connection back to the pool while the hash is checked.
+    # The loaded user stays usable (closing the session does not expire it).
+    db.session.close()
+    hasher = get_password_hasher()
+
+    # Verify password matches hash
+    try:
+        if not hasher.verify(user.password_hash, password):
+            return jsonify({'error': 'Invalid email or password'}), 401
+    except PasswordHasherBusy:
+        return hashing_busy()
+
+    # Upgrade hashes made with an older method or cost while we have the plain password.
+    # The upgrade is optional: if the pool is saturated, skip it (the next login retries).
+    if hasher.needs_rehash(user.password_hash):
+        try:
+            new_hash = hasher.hash(password)
+        except PasswordHasherBusy:
+            new_hash = None
+        if new_hash:
+            User.query.filter_by(id=user.id).update(
+                {User.password_hash: new_hash}, synchronize_session=False
+            )
+            db.session.commit()
+
     # Generate JWT Token
     # Using user.id as identity is recommended for database lookups in protected routes.
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_access_token(user)
 
     return jsonify({
         'message': 'Login successful',
@@ -148,4 +190,30 @@ def login():
             'username': user.username,
             'email': user.email
         }
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+@bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """
+    Revoke every access token issued to the current user (all devices).
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Tokens revoked
+    """
+    current_user = get_current_user()
+
+    User.query.filter_by(id=current_user.id).update(
+        {User.token_version: User.token_version + 1}, synchronize_session=False
+    )
+    db.session.commit()
+    invalidate_token_version(current_user.id)
+    disconnect_user(current_user.id)
+
+    return jsonify({'message': 'All sessions have been logged out'}), 200
@@ -0,0 +1,114 @@
+"""
+JSON encoding and compression benchmark on typical get_messages payloads.
+
+    cd backend
+    python -m benchmarks.payloads
+    python -m benchmarks.payloads --messages 100 --content-words 40 --output payloads.json
+
+Builds history pages shaped like GET /api/chats/<id>/messages responses
+(Message.to_dict() items) and reports, per JSON provider, the time to build
+the response, and per encoding, the body size and the time to compress it.
+No database is needed.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from app import create_app
+from compression import _compress, brotli
+from json_provider import PROVIDERS, orjson
+
+WORDS = (
+    'hey are we still on for tomorrow the meeting moved to three pm can you send the '
+    'report before lunch thanks sounds good see you there lorem ipsum dolor sit amet'
+).split()
+
+
+def message_page(messages, content_words, rng_seed=42):
+    """A history page: `messages` dicts with ~content_words words of chat-like text each."""
+    rng = random.Random(rng_seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': 100_000 + i,
+            'content': ' '.join(rng.choice(WORDS) for _ in range(max(1, int(rng.gauss(content_words, content_words / 3))))),
+            'timestamp': (start + timedelta(seconds=37 * i)).isoformat(),
+            'author_id': rng.choice((1, 2)),
+            'chat_id': 42,
+        }
+        for i in range(messages)
+    ]
+
+
+def _time(fn, repeat):
+    """Median seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run(messages=50, content_words=25, repeat=200):
+    payload = message_page(messages, content_words)
+    results = {'meta': {'messages': messages, 'content_words': content_words, 'repeat': repeat},
+               'providers': {}, 'encodings': {}}
+
+    body = None
+    for name in PROVIDERS:
+        if name == 'orjson' and orjson is None:
+            continue
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JSON_PROVIDER': name})
+        with app.app_context():
+            response = app.json.response(payload)
+            body = body or response.get_data()
+            results['providers'][name] = {
+                'encode_us': _time(lambda: app.json.response(payload), repeat) * 1e6,
+                'bytes': len(response.get_data()),
+            }
+
+    config = app.config
+    results['encodings']['identity'] = {'bytes': len(body), 'compress_us': 0.0}
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and brotli is None:
+            continue
+        results['encodings'][encoding] = {
+            'bytes': len(_compress(encoding, body, config)),
+            'compress_us': _time(lambda: _compress(encoding, body, config), repeat) * 1e6,
+        }
+
+    return results
+
+
+def print_report(results):
+    meta = results['meta']
+    print(f"get_messages page: {meta['messages']} messages, ~{meta['content_words']} words each")
+    print(f"{'provider':<12}{'encode us':>12}{'bytes':>10}")
+    for name, row in results['providers'].items():
+        print(f"{name:<12}{row['encode_us']:>12.1f}{row['bytes']:>10}")
+    identity = results['encodings']['identity']['bytes']
+    print(f"{'encoding':<12}{'compress us':>12}{'bytes':>10}{'ratio':>8}")
+    for name, row in results['encodings'].items():
+        print(f"{name:<12}{row['compress_us']:>12.1f}{row['bytes']:>10}{identity / row['bytes']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding and compression of message pages.')
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--content-words', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help='Write results as JSON to this file.')
+    args = parser.parse_args(argv)
+
+    results = run(args.messages, args.content_words, args.repeat)
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from extensions import db
+from models import User
+
+# Sentinel for cache misses, so falsy values (e.g. "not a member") can be cached.
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache with per-entry expiry.
+    Keeps hit/miss counters so cache efficiency can be monitored.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Stores value for `ttl` seconds (the cache-wide TTL by default)."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Drops every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+# --- Chat membership cache ---
+# Maps (user_id, chat_id) -> bool. Lives in app.extensions, so every app
+# (and every worker process) has its own copy. Invalidation is local to the
+# process; the TTL bounds how long other processes may serve a stale answer.
+# Group entries use the much shorter MEMBERSHIP_GROUP_CACHE_TTL, since group
+# members can be removed (or added) by someone else at any time.
+
+def init_membership_cache(app):
+    app.extensions['membership_cache'] = TTLCache(
+        maxsize=app.config['MEMBERSHIP_CACHE_SIZE'],
+        ttl=app.config['MEMBERSHIP_CACHE_TTL']
+    )
+
+
+def get_membership_cache():
+    return current_app.extensions['membership_cache']
+
+
+def invalidate_membership(user_id, chat_id=None):
+    """Forgets one (user, chat) entry, or every entry of the user if chat_id is None."""
+    cache = get_membership_cache()
+    if chat_id is not None:
+        cache.delete((user_id, chat_id))
+    else:
+        cache.delete_where(lambda key: key[0] == user_id)
+
+
+# --- User profile cache ---
+# Read-through cache of the compact public profile {id, username, email},
+# keyed by user id. The storage is pluggable (PROFILE_CACHE_BACKEND):
+#   - 'local': per-process TTL/LRU (default). update/delete invalidate only the
+#     local process; other workers may serve the old profile for up to the TTL.
+#   - 'redis': shared across processes (pip install redis, PROFILE_CACHE_URL).
+#   - any object with get_many / set_many / delete (e.g. a fake in tests).
+
+class LocalProfileBackend:
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self._cache.get(key)
+            if value is not MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, mapping):
+        for key, value in mapping.items():
+            self._cache.set(key, value)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+
+class RedisProfileBackend:
+    """Profiles as JSON strings with a TTL; one MGET / pipelined SETEX per batch."""
+
+    def __init__(self, url, ttl, prefix='profile:'):
+        import redis  # Optional dependency, only needed for this backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._redis.mget([f'{self.prefix}{key}' for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, mapping):
+        pipe = self._redis.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(f'{self.prefix}{key}', self.ttl, json.dumps(value))
+        pipe.execute()
+
+    def delete(self, key):
+        self._redis.delete(f'{self.prefix}{key}')
+
+
+class ProfileCache:
+    """Read-through layer: cache misses are loaded with one IN query and stored."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, user_ids):
+        """Returns {user_id: profile} for the users that exist."""
+        user_ids = set(user_ids)
+        profiles = self.backend.get_many(user_ids)
+        missing = user_ids - profiles.keys()
+        with self._lock:
+            self.hits += len(profiles)
+            self.misses += len(missing)
+
+        if missing:
+            rows = db.session.query(User.id, User.username, User.email).filter(User.id.in_(missing)).all()
+            loaded = {row.id: {'id': row.id, 'username': row.username, 'email': row.email} for row in rows}
+            if loaded:
+                self.backend.set_many(loaded)
+            profiles.update(loaded)
+
+        return profiles
+
+    def get(self, user_id):
+        return self.get_many([user_id]).get(user_id)
+
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+def init_profile_cache(app):
+    backend = app.config['PROFILE_CACHE_BACKEND']
+
+    if backend == 'local':
+        backend = LocalProfileBackend(app.config['PROFILE_CACHE_SIZE'], app.config['PROFILE_CACHE_TTL'])
+    elif backend == 'redis':
+        backend = RedisProfileBackend(app.config['PROFILE_CACHE_URL'], app.config['PROFILE_CACHE_TTL'])
+    elif isinstance(backend, str):
+        raise ValueError(f'Unknown PROFILE_CACHE_BACKEND: {backend!r}')
+
+    app.extensions['profile_cache'] = ProfileCache(backend)
+
+
+def get_profile_cache():
+    return current_app.extensions['profile_cache']
@@ -1,7 +1,20 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import and_, tuple_
+from sqlalchemy.exc import IntegrityError
 from extensions import db
-from models import User, Chat, Message
+from conditional import make_etag, not_modified, with_etag
+from cache import MISSING, get_membership_cache, get_profile_cache, invalidate_membership
+from notifier import get_notifier
+from search import search_messages
+from tokens import get_current_user
+from metrics import MESSAGES_SENT
+from models import User, Chat, Message, user_chat_association
+from realtime import (
+    broadcast_new_message, broadcast_message_edited, broadcast_message_deleted, evict_from_chat,
+)
 
 # Blueprint 1: Handles Chat operations and sending messages to a chat.
 # Base URL: /api/chats
@@ -11,17 +24,89 @@ chat_bp = Blueprint('chat', __name__, url_prefix='/api/chats')
 # Base URL: /api/messages
 message_bp = Blueprint('message', __name__, url_prefix='/api/messages')
 
+# Blueprint 3: Catch-up for several chats in one round trip (reconnecting clients).
+# Base URL: /api/sync
+sync_bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+# Characters of the newest message returned with each chat in the chat list.
+PREVIEW_LENGTH = 100
+
+
+def is_chat_participant(chat_id, user_id):
+    """
+    Membership check backed by the per-process membership cache.
+    Steady-state polling and sending skip the participants query entirely.
+    Group answers expire after MEMBERSHIP_GROUP_CACHE_TTL: a member removed
+    through another worker loses access within that window.
+    """
+    cache = get_membership_cache()
+    allowed = cache.get((user_id, chat_id))
+
+    if allowed is MISSING:
+        row = Chat.membership(chat_id, user_id)
+        allowed = bool(row and row.is_member)
+        ttl = current_app.config['MEMBERSHIP_GROUP_CACHE_TTL'] if row and row.is_group else None
+        cache.set((user_id, chat_id), allowed, ttl=ttl)
+
+    return allowed
+
+
+def chat_participant_required(view):
+    """
+    Authorizes chat-scoped routes (views taking a `chat_id` URL argument).
+    Apply below @jwt_required(). A cached indexed probe covers the common case;
+    the Chat row is only loaded to tell 404 from 403 when access is denied.
+    """
+    @wraps(view)
+    def wrapper(chat_id, *args, **kwargs):
+        current_user_id = get_current_user().id
+
+        if not is_chat_participant(chat_id, current_user_id):
+            if db.session.get(Chat, chat_id) is None:
+                return jsonify({'error': 'Chat not found'}), 404
+            return jsonify({'error': 'Access denied'}), 403
+
+        return view(chat_id, *args, **kwargs)
+    return wrapper
+
+
+def _encode_chat_cursor(last_activity, chat_id):
+    return f"{last_activity.isoformat() if last_activity else ''}_{chat_id}"
+
+
+def _decode_chat_cursor(cursor):
+    """Parses '<last_activity iso>_<chat_id>'; returns None if malformed."""
+    activity, _, chat_id = cursor.rpartition('_')
+    try:
+        return (datetime.fromisoformat(activity) if activity else None), int(chat_id)
+    except ValueError:
+        return None
+
 
 @chat_bp.route('', methods=['GET'])
 @jwt_required()
 def get_chats():
     """
-    Retrieve all chats for the current user.
+    Retrieve the current user's chats, most recently active first, one page at a time.
+    Params:
+      - limit: int (default 50, capped at CHATS_PAGE_MAX)
+      - cursor: str (optional) - X-Next-Cursor of the previous page
+    Response headers:
+      - X-Has-More: "true" if more chats remain
+      - X-Next-Cursor: value to pass as `cursor` for the next page
+      - ETag: send back as If-None-Match to get 304 while nothing changed
     ---
     tags:
       - Chats
     security:
       - Bearer: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+      - in: query
+        name: cursor
+        type: string
     responses:
       200:
         description: List of active chats
@@ -32,27 +117,137 @@ def get_chats():
             properties:
               id:
                 type: integer
+              is_group:
+                type: boolean
+              name:
+                type: string
+                description: Group name (null for 1-on-1 chats)
+              member_count:
+                type: integer
               partner_id:
                 type: integer
+                description: The other member of a 1-on-1 chat (null for groups)
               partner_username:
                 type: string
+              unread_count:
+                type: integer
+              last_activity:
+                type: string
+              last_message:
+                type: object
+                description: Preview of the newest message (null for empty chats)
+      304:
+        description: Not modified since the ETag in If-None-Match
+      400:
+        description: Malformed cursor
     """
-    current_user_id = int(get_jwt_identity())
-    current_user = db.session.get(User, current_user_id)
+    current_user_id = get_current_user().id
+    max_limit = current_app.config['CHATS_PAGE_MAX']
+    limit = min(max(request.args.get('limit', current_app.config['CHATS_PAGE_SIZE'], type=int), 1), max_limit)
+
+    cursor = request.args.get('cursor')
+    position = None
+    if cursor:
+        position = _decode_chat_cursor(cursor)
+        if position is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
 
-    results = []
+    # Single set-based query instead of walking current_user.chats and lazy-loading
+    # each chat's participants (1 + N round trips), in two branches of at most
+    # limit + 1 rows each, merged by activity:
+    # - 1-on-1 chats pair each of my participant rows with the OTHER participant of
+    #   the same chat (outer join: the partner may have deleted their account).
+    #   Both rows carry the chat's activity, so this branch is a range scan on the
+    #   (user_id, is_group, last_activity, chat_id) index.
+    # - Groups skip that join and are ordered by chats.last_activity: sending to a
+    #   group never writes its members' rows, so only the user's group rows
+    #   (usually few) are read and sorted.
+    # Unread counts and the preview are denormalized, so no messages are counted or sorted.
+    # Partner usernames come from the profile cache (one extra query only for misses).
+    mine = user_chat_association.alias('mine')
+    other = user_chat_association.alias('other')
 
-    # Iterate over the user's chats
-    for chat in current_user.chats:
-        # MVP Logic for 1-on-1: Find the participant who is NOT me.
-        partner = next((p for p in chat.participants if p.id != current_user_id), None)
-        results.append({
-            'id': chat.id,
-            'partner_id': partner.id if partner else None,
-            'partner_username': partner.username if partner else "Unknown",
-        })
+    def branch(is_group):
+        activity = Chat.last_activity if is_group else mine.c.last_activity
+        query = (
+            db.select(
+                mine.c.chat_id, (Chat.message_count - mine.c.read_count).label('unread_count'),
+                activity.label('last_activity'),
+                (db.null() if is_group else other.c.user_id).label('partner_id'),
+                Chat.is_group, Chat.name, Chat.member_count, Message.id.label('message_id'),
+                db.func.substr(Message.content, 1, PREVIEW_LENGTH).label('preview'),
+                Message.timestamp, Message.user_id.label('author_id'), mine.c.version
+            )
+            .select_from(mine)
+            .join(Chat, Chat.id == mine.c.chat_id)
+            .outerjoin(Message, Message.id == Chat.last_message_id)
+            .where(mine.c.user_id == current_user_id, mine.c.is_group.is_(is_group))
+        )
+        if not is_group:
+            query = query.outerjoin(other, and_(
+                other.c.chat_id == mine.c.chat_id,
+                other.c.user_id != current_user_id
+            ))
+        if position is not None:
+            query = query.where(tuple_(activity, mine.c.chat_id) < position)
+        return query.order_by(activity.desc(), mine.c.chat_id.desc()).limit(limit + 1).subquery()
 
-    return jsonify(results), 200
+    pages = [branch(False), branch(True)]
+    merged = db.union_all(*(db.select(*page.c) for page in pages)).subquery()
+    rows = db.session.execute(
+        db.select(*merged.c)
+        .order_by(merged.c.last_activity.desc(), merged.c.chat_id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    partners = get_profile_cache().get_many(row[3] for row in rows if row[3] is not None)
+
+    # Conditional GET: the validator is computed from the page's own rows, which
+    # the range scan above has already read, so it never looks at the rest of
+    # the list and a 304 skips building and encoding the response. The row
+    # version covers partner renames (see touch_members), and the usernames
+    # actually served are hashed too: a profile cache entry that is stale on
+    # this process must not be kept by clients once it refreshes.
+    served_names = [partners[row[3]]['username'] if row[3] in partners else None for row in rows]
+    etag = make_etag('chats', current_user_id, has_more, *rows, *served_names)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    results = [
+        {
+            'id': chat_id,
+            'is_group': is_group,
+            'name': name,
+            'member_count': member_count,
+            'partner_id': partner_id if partner_id in partners else None,
+            'partner_username': (
+                None if is_group
+                else partners[partner_id]['username'] if partner_id in partners else "Unknown"
+            ),
+            'unread_count': unread_count,
+            'last_activity': last_activity.isoformat() if last_activity else None,
+            'last_message': {
+                'id': message_id,
+                'content': preview,
+                'timestamp': timestamp.isoformat(),
+                'author_id': author_id,
+            } if message_id else None,
+        }
+        for (chat_id, unread_count, last_activity, partner_id, is_group, name, member_count,
+             message_id, preview, timestamp, author_id, _) in rows
+    ]
+
+    response = with_etag(jsonify(results), etag)
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        last = rows[-1]
+        response.headers['X-Next-Cursor'] = _encode_chat_cursor(last[2], last[0])
+
+    return response, 200
 
 
 @chat_bp.route('', methods=['POST'])
@@ -87,7 +282,7 @@ def create_chat():
       404:
         description: Recipient not found
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     data = request.get_json()
     recipient_id = data.get('recipient_id')
 
@@ -97,21 +292,14 @@ def create_chat():
     if current_user_id == recipient_id:
         return jsonify({'error': 'Cannot chat with yourself'}), 400
 
-    recipient = db.session.get(User, recipient_id)
-    if not recipient:
+    # Existence check through the profile cache; no User rows are loaded
+    if not isinstance(recipient_id, int) or get_profile_cache().get(recipient_id) is None:
         return jsonify({'error': 'Recipient not found'}), 404
 
-    current_user = db.session.get(User, current_user_id)
-
     # --- LOGIC TO PREVENT DUPLICATES ---
-    existing_chat = None
-
-    for chat in current_user.chats:
-        if len(chat.participants) == 2:
-            participant_ids = [p.id for p in chat.participants]
-            if recipient.id in participant_ids:
-                existing_chat = chat
-                break
+    # One probe on the unique (direct_low_id, direct_high_id) index.
+    low_id, high_id = Chat.direct_pair(current_user_id, recipient_id)
+    existing_chat = Chat.query.filter_by(direct_low_id=low_id, direct_high_id=high_id).first()
 
     if existing_chat:
         return jsonify({
@@ -120,22 +308,287 @@ def create_chat():
         }), 200
     # -----------------------------------
 
-    new_chat = Chat()
-    new_chat.participants.append(current_user)
-    new_chat.participants.append(recipient)
-
     try:
-        db.session.add(new_chat)
+        new_chat = Chat.insert_direct(current_user_id, recipient_id)
         db.session.commit()
+    except IntegrityError:
+        # A concurrent request created the same pair first: return that chat.
+        db.session.rollback()
+        existing_chat = Chat.query.filter_by(direct_low_id=low_id, direct_high_id=high_id).first()
+        if not existing_chat:
+            return jsonify({'error': 'Failed to create chat'}), 500
+        return jsonify({
+            'message': 'Chat already exists',
+            'chat_id': existing_chat.id
+        }), 200
     except Exception:
         db.session.rollback()
         return jsonify({'error': 'Failed to create chat'}), 500
 
+    # Drop any "not a member" answers cached for this chat id before it existed
+    invalidate_membership(current_user_id, new_chat.id)
+    invalidate_membership(recipient_id, new_chat.id)
+
     return jsonify({'message': 'Chat created', 'chat_id': new_chat.id}), 201
 
 
+def _existing_user_ids(user_ids):
+    """Keeps the ids (in order, deduplicated) that belong to existing users; one IN query."""
+    user_ids = list(dict.fromkeys(uid for uid in user_ids if isinstance(uid, int)))
+    if not user_ids:
+        return []
+    found = set(db.session.execute(db.select(User.id).where(User.id.in_(user_ids))).scalars())
+    return [uid for uid in user_ids if uid in found]
+
+
+def _member_ids_from(data):
+    member_ids = (data or {}).get('member_ids')
+    return member_ids if isinstance(member_ids, list) else None
+
+
+@chat_bp.route('/groups', methods=['POST'])
+@jwt_required()
+def create_group():
+    """
+    Create a group chat owned by the current user.
+    ---
+    tags:
+      - Chats
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - name
+          properties:
+            name:
+              type: string
+              example: Weekend trip
+            member_ids:
+              type: array
+              items:
+                type: integer
+              example: [2, 3]
+    responses:
+      201:
+        description: Group created
+      400:
+        description: Invalid input or too many members
+    """
+    current_user_id = get_current_user().id
+    data = request.get_json(silent=True) or {}
+    name = (data.get('name') or '').strip()
+    member_ids = _member_ids_from(data) if 'member_ids' in data else []
+
+    if not name or len(name) > 100:
+        return jsonify({'error': 'Group name (up to 100 characters) is required'}), 400
+
+    if member_ids is None:
+        return jsonify({'error': 'member_ids must be a list of user ids'}), 400
+
+    if len(member_ids) + 1 > current_app.config['GROUP_MAX_MEMBERS']:
+        return jsonify({'error': 'Too many members'}), 400
+
+    member_ids = [uid for uid in _existing_user_ids(member_ids) if uid != current_user_id]
+
+    try:
+        chat = Chat.insert_group(current_user_id, name, member_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create chat'}), 500
+
+    # Drop any "not a member" answers cached for this chat id before it existed
+    for user_id in (current_user_id, *member_ids):
+        invalidate_membership(user_id, chat.id)
+
+    return jsonify({
+        'message': 'Group created',
+        'chat_id': chat.id,
+        'member_count': len(member_ids) + 1,
+    }), 201
+
+
+@chat_bp.route('/<int:chat_id>/members', methods=['GET'])
+@jwt_required()
+@chat_participant_required
+def get_members(chat_id):
+    """
+    List the members of a chat, one page at a time (ordered by user id).
+    Params:
+      - limit: int (default 100, capped at MEMBERS_PAGE_MAX)
+      - after_id: int (optional) - X-Next-Cursor of the previous page
+    Response headers:
+      - X-Has-More / X-Next-Cursor: as for message history
+    ---
+    tags:
+      - Chats
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: chat_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Members (id, username)
+      403:
+        description: Access denied (not a participant)
+      404:
+        description: Chat not found
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), current_app.config['MEMBERS_PAGE_MAX'])
+    after_id = request.args.get('after_id', 0, type=int)
+
+    # Range scan on the (chat_id, user_id) index, however large the roster is
+    members = user_chat_association.c
+    user_ids = db.session.execute(
+        db.select(members.user_id)
+        .where(members.chat_id == chat_id, members.user_id > after_id)
+        .order_by(members.user_id)
+        .limit(limit + 1)
+    ).scalars().all()
+
+    has_more = len(user_ids) > limit
+    user_ids = user_ids[:limit]
+    profiles = get_profile_cache().get_many(user_ids)
+
+    response = jsonify([
+        {'id': user_id, 'username': profiles[user_id]['username']}
+        for user_id in user_ids if user_id in profiles
+    ])
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        response.headers['X-Next-Cursor'] = str(user_ids[-1])
+
+    return response, 200
+
+
+@chat_bp.route('/<int:chat_id>/members', methods=['POST'])
+@jwt_required()
+@chat_participant_required
+def add_members(chat_id):
+    """
+    Add users to a group chat. Any member may add people.
+    ---
+    tags:
+      - Chats
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: chat_id
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - member_ids
+          properties:
+            member_ids:
+              type: array
+              items:
+                type: integer
+              example: [4, 5]
+    responses:
+      200:
+        description: Ids actually added (unknown users and existing members are skipped)
+      400:
+        description: Not a group chat, invalid input or too many members
+      403:
+        description: Access denied (not a participant)
+    """
+    member_ids = _member_ids_from(request.get_json(silent=True))
+    if member_ids is None:
+        return jsonify({'error': 'member_ids must be a list of user ids'}), 400
+
+    chat = db.session.get(Chat, chat_id)
+    if not chat.is_group:
+        return jsonify({'error': 'Members can only be added to group chats'}), 400
+
+    if chat.member_count + len(member_ids) > current_app.config['GROUP_MAX_MEMBERS']:
+        return jsonify({'error': 'Too many members'}), 400
+
+    try:
+        added = Chat.add_members(chat, _existing_user_ids(member_ids))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to add members'}), 500
+
+    for user_id in added:
+        invalidate_membership(user_id, chat_id)
+
+    return jsonify({'chat_id': chat_id, 'added': added}), 200
+
+
+@chat_bp.route('/<int:chat_id>/members/<int:user_id>', methods=['DELETE'])
+@jwt_required()
+@chat_participant_required
+def remove_member(chat_id, user_id):
+    """
+    Remove a member from a group chat. The owner may remove anyone;
+    other members may only remove themselves (leave).
+    ---
+    tags:
+      - Chats
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: chat_id
+        type: integer
+        required: true
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Member removed
+      400:
+        description: Not a group chat
+      403:
+        description: Access denied
+      404:
+        description: Not a member
+    """
+    current_user_id = get_current_user().id
+
+    chat = db.session.get(Chat, chat_id)
+    if not chat.is_group:
+        return jsonify({'error': 'Members can only be removed from group chats'}), 400
+
+    if user_id != current_user_id and chat.owner_id != current_user_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    try:
+        removed = Chat.remove_members(chat_id, [user_id])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to remove member'}), 500
+
+    if not removed:
+        return jsonify({'error': 'Not a member'}), 404
+
+    invalidate_membership(user_id, chat_id)
+    evict_from_chat(user_id, chat_id)
+
+    return jsonify({'message': 'Member removed'}), 200
+
+
 @chat_bp.route('/<int:chat_id>/messages', methods=['POST'])
 @jwt_required()
+@chat_participant_required
 def send_message(chat_id):
     """
     Send a message to a specific chat.
@@ -168,21 +621,13 @@ def send_message(chat_id):
       404:
         description: Chat not found
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     data = request.get_json()
     content = data.get('content')
 
     if not content:
         return jsonify({'error': 'Message content is required'}), 400
 
-    chat = db.session.get(Chat, chat_id)
-    if not chat:
-        return jsonify({'error': 'Chat not found'}), 404
-
-    is_participant = any(user.id == current_user_id for user in chat.participants)
-    if not is_participant:
-        return jsonify({'error': 'Access denied'}), 403
-
     message = Message(
         content=content,
         user_id=current_user_id,
@@ -191,76 +636,245 @@ def send_message(chat_id):
 
     try:
         db.session.add(message)
+        db.session.flush()
+        Chat.record_message(message)
         db.session.commit()
     except Exception:
         db.session.rollback()
         return jsonify({'error': 'Failed to send message'}), 500
 
+    MESSAGES_SENT.inc()
+
+    # Push to participants subscribed over Socket.IO and wake long-polling requests
+    # (plain polling clients catch up via after_id)
+    broadcast_new_message(message)
+    get_notifier().notify(chat_id)
+
     return jsonify(message.to_dict()), 201
 
 
+@chat_bp.route('/<int:chat_id>/read', methods=['POST'])
+@jwt_required()
+@chat_participant_required
+def mark_chat_read(chat_id):
+    """
+    Move the current user's read cursor in a chat.
+    ---
+    tags:
+      - Chats
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: chat_id
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            message_id:
+              type: integer
+              description: Newest message seen (defaults to the chat's latest message)
+    responses:
+      200:
+        description: Updated read state
+      403:
+        description: Access denied (not a participant)
+      404:
+        description: Chat not found
+    """
+    current_user_id = get_current_user().id
+    data = request.get_json(silent=True) or {}
+
+    last_message_id = db.session.query(Chat.last_message_id).filter_by(id=chat_id).scalar()
+    if last_message_id is None:
+        return jsonify({'chat_id': chat_id, 'last_read_message_id': None, 'unread_count': 0}), 200
+
+    # A cursor past the newest message would hide messages that arrive later
+    message_id = data.get('message_id')
+    if not isinstance(message_id, int) or message_id > last_message_id:
+        message_id = last_message_id
+
+    try:
+        last_read_message_id, unread_count = Chat.mark_read(chat_id, current_user_id, message_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update read state'}), 500
+
+    return jsonify({
+        'chat_id': chat_id,
+        'last_read_message_id': last_read_message_id,
+        'unread_count': unread_count,
+    }), 200
+
+
 @chat_bp.route('/<int:chat_id>/messages', methods=['GET'])
 @jwt_required()
+@chat_participant_required
 def get_messages(chat_id):
     """
     Retrieve message history with pagination.
     Params:
-      - limit: int (default 50)
-      - after_id: int (optional) - For polling (newer than X)
+      - limit: int (default 50, capped at MESSAGES_PAGE_MAX)
+      - after_id: int (optional) - For polling (newer than X, oldest first)
       - before_id: int (optional) - For pagination (older than X)
+      - wait: float (optional, with after_id) - Long polling: hold the request open
+        up to this many seconds (capped at LONG_POLL_MAX_WAIT) until a new message arrives
+    Response headers:
+      - X-Has-More: "true" if more messages remain in the requested direction
+      - X-Next-Cursor: id to pass as before_id (history) or after_id (polling)
+        to fetch the next page
+      - ETag / Cache-Control (before_id pages): cacheable for HISTORY_MAX_AGE,
+        revalidate with If-None-Match (304 until a message is edited or deleted)
     ---
     tags:
       - Messages
     security:
       - Bearer: []
     """
-    current_user_id = int(get_jwt_identity())
-
     # Get query params
-    limit = request.args.get('limit', 50, type=int)
+    # The hard cap protects worker memory and latency from a single busy chat.
+    max_limit = current_app.config['MESSAGES_PAGE_MAX']
+    limit = min(max(request.args.get('limit', 50, type=int), 1), max_limit)
     after_id = request.args.get('after_id', type=int)
-    before_id = request.args.get('before_id', type=int) # 👈 ADDED BACK
+    before_id = request.args.get('before_id', type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), current_app.config['LONG_POLL_MAX_WAIT'])
 
-    chat = db.session.get(Chat, chat_id)
-    if not chat:
-        return jsonify({'error': 'Chat not found'}), 404
-
-    is_participant = any(user.id == current_user_id for user in chat.participants)
-    if not is_participant:
-        return jsonify({'error': 'Access denied'}), 403
+    # Older history pages only change on edits and deletes (new messages never
+    # land before before_id), so the chat's history_version identifies them.
+    history_etag = None
+    if after_id is None and before_id:
+        history_version = db.session.query(Chat.history_version).filter_by(id=chat_id).scalar()
+        history_etag = make_etag('history', chat_id, before_id, limit, history_version)
+        cached = not_modified(history_etag, current_app.config['HISTORY_MAX_AGE'])
+        if cached:
+            return cached
 
     # Build Query
+    # Message.id is the single ordering key, so every page is a range scan
+    # on the (chat_id, id) index. Each branch fetches one extra row to know
+    # whether another page remains.
     query = Message.query.filter_by(chat_id=chat_id)
 
-    if after_id:
-        # Polling: Get NEWER messages
-        query = query.filter(Message.id > after_id).order_by(Message.timestamp.asc())
-    elif before_id:
-        # Pagination: Get OLDER messages (History)
-        # 👈 ADDED BACK: Logic to fetch messages OLDER than before_id
-        query = query.filter(Message.id < before_id).order_by(Message.timestamp.desc()).limit(limit)
+    if after_id is not None:
+        # Polling: Get NEWER messages, oldest first, so catching up after a long
+        # absence becomes a stream of bounded pages.
+        query = query.filter(Message.id > after_id).order_by(Message.id.asc()).limit(limit + 1)
+
+        with get_notifier().listen(chat_id) as new_message_event:
+            messages = query.all()
+
+            if not messages and wait:
+                # Long polling: hand the DB connection back to the pool before sleeping,
+                # then re-query once send_message wakes us (or the timeout expires).
+                # Under the default gevent worker the wait parks a greenlet, not a
+                # thread; a gthread worker spends one of its threads per waiter.
+                db.session.close()
+                if new_message_event.wait(wait):
+                    messages = query.all()
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        next_cursor = messages[-1].id if has_more else None
     else:
-        # Initial Load: Get latest messages
-        query = query.order_by(Message.timestamp.desc()).limit(limit)
+        if before_id:
+            # Pagination: Get OLDER messages (History)
+            query = query.filter(Message.id < before_id)
+
+        # Initial Load / Pagination
+        messages = query.order_by(Message.id.desc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
 
-    messages = query.all()
+        # We fetched by DESC, reverse to show chronological order
+        messages = messages[:limit][::-1]
+        next_cursor = messages[0].id if has_more else None
 
-    # If we fetched by DESC (Initial load OR Pagination), reverse to show chronological order
-    if not after_id:
-        messages = messages[::-1]
+    response = jsonify([msg.to_dict() for msg in messages])
+    if history_etag:
+        response = with_etag(response, history_etag, current_app.config['HISTORY_MAX_AGE'])
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
 
-    return jsonify([msg.to_dict() for msg in messages]), 200
+    return response, 200
 
 
 # --- Message Control Routes (Edit/Delete) ---
 
+@message_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    """
+    Full-text search over messages in the current user's chats, best matches first.
+    Params:
+      - q: str (required) - words to find (all must match)
+      - chat_id: int (optional) - restrict to one chat
+      - limit: int (default 20, capped at SEARCH_PAGE_MAX)
+      - cursor: str (optional) - X-Next-Cursor of the previous page
+    Only the newest SEARCH_RANK_WINDOW matches are ranked and paged through.
+    ---
+    tags:
+      - Messages
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+      - in: query
+        name: chat_id
+        type: integer
+      - in: query
+        name: limit
+        type: integer
+      - in: query
+        name: cursor
+        type: string
+    responses:
+      200:
+        description: Matching messages (message fields plus `score`)
+      400:
+        description: Missing or empty query, or malformed cursor
+    """
+    current_user_id = get_current_user().id
+    q = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), current_app.config['SEARCH_PAGE_MAX'])
+    chat_id = request.args.get('chat_id', type=int)
+    window = current_app.config['SEARCH_RANK_WINDOW']
+
+    # Ranked results have no stable keyset: the cursor is an offset into the ranking
+    cursor = request.args.get('cursor', '0')
+    if not cursor.isdigit():
+        return jsonify({'error': 'Invalid cursor'}), 400
+    offset = min(int(cursor), window)
+
+    rows = search_messages(current_user_id, q, limit + 1, offset, window, chat_id=chat_id)
+    if rows is None:
+        return jsonify({'error': 'Search query is required'}), 400
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = jsonify([{**message.to_dict(), 'score': score} for message, score in rows])
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        response.headers['X-Next-Cursor'] = str(offset + limit)
+
+    return response, 200
+
+
 @message_bp.route('/<int:message_id>', methods=['PUT'])
 @jwt_required()
 def edit_message(message_id):
     """
     Edit a specific message.
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     data = request.get_json()
     new_content = data.get('content')
 
@@ -277,11 +891,14 @@ def edit_message(message_id):
     message.content = new_content
 
     try:
+        Chat.record_edit(message)
         db.session.commit()
     except Exception:
         db.session.rollback()
         return jsonify({'error': 'Failed to update message'}), 500
 
+    broadcast_message_edited(message)
+
     return jsonify(message.to_dict()), 200
 
 
@@ -291,7 +908,7 @@ def delete_message(message_id):
     """
     Delete a specific message.
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
 
     message = db.session.get(Message, message_id)
     if not message:
@@ -300,11 +917,113 @@ def delete_message(message_id):
     if message.user_id != current_user_id:
         return jsonify({'error': 'Access denied'}), 403
 
+    chat_id = message.chat_id
+
     try:
+        Chat.forget_message(message)
         db.session.delete(message)
         db.session.commit()
     except Exception:
         db.session.rollback()
         return jsonify({'error': 'Failed to delete message'}), 500
 
-    return jsonify({'message': 'Message deleted'}), 200
\ No newline at end of file
+    broadcast_message_deleted(message_id, chat_id)
+
+    return jsonify({'message': 'Message deleted'}), 200
+
+
+# --- Multi-chat Sync ---
+
+@sync_bp.route('', methods=['POST'])
+@jwt_required()
+def sync():
+    """
+    Fetch new messages for several chats at once (e.g. after reconnecting).
+    Replaces one `GET /chats/<id>/messages?after_id=` call per chat.
+    ---
+    tags:
+      - Messages
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - chats
+          properties:
+            chats:
+              type: object
+              description: Map of chat_id -> id of the newest message the client has (0 for none)
+              example: {"1": 42, "7": 0}
+            limit:
+              type: integer
+              description: Messages per chat (default 50, capped at MESSAGES_PAGE_MAX)
+    responses:
+      200:
+        description: >
+          `chats`: chat_id -> {messages (oldest first), has_more, next_cursor} for chats
+          with new messages; `denied`: requested chats the user cannot access
+      400:
+        description: Invalid input or too many chats
+    """
+    current_user_id = get_current_user().id
+    data = request.get_json(silent=True) or {}
+    requested = data.get('chats')
+
+    if not isinstance(requested, dict):
+        return jsonify({'error': 'chats must map chat ids to message ids'}), 400
+
+    if len(requested) > current_app.config['SYNC_MAX_CHATS']:
+        return jsonify({'error': 'Too many chats'}), 400
+
+    try:
+        last_seen = {int(chat_id): int(after_id or 0) for chat_id, after_id in requested.items()}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'chats must map chat ids to message ids'}), 400
+
+    limit = data.get('limit', 50)
+    limit = min(max(limit if isinstance(limit, int) else 50, 1), current_app.config['MESSAGES_PAGE_MAX'])
+
+    # One membership query for every requested chat (instead of one check per chat)
+    members = user_chat_association.c
+    allowed = set(db.session.execute(
+        db.select(members.chat_id)
+        .where(members.user_id == current_user_id, members.chat_id.in_(list(last_seen)))
+    ).scalars()) if last_seen else set()
+
+    # One statement: a bounded range scan on the (chat_id, id) index per chat,
+    # glued with UNION ALL. Each branch fetches one extra row to detect more pages.
+    pages = [
+        db.select(Message)
+        .where(Message.chat_id == chat_id, Message.id > last_seen[chat_id])
+        .order_by(Message.id)
+        .limit(limit + 1)
+        .subquery()
+        for chat_id in sorted(allowed)
+    ]
+    new_messages = []
+    if pages:
+        batch = db.aliased(Message, db.union_all(*(db.select(page) for page in pages)).subquery())
+        new_messages = db.session.query(batch).order_by(batch.chat_id, batch.id).all()
+
+    by_chat = {}
+    for message in new_messages:
+        by_chat.setdefault(message.chat_id, []).append(message)
+
+    chats = {}
+    for chat_id, messages in by_chat.items():
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        chats[str(chat_id)] = {
+            'messages': [msg.to_dict() for msg in messages],
+            'has_more': has_more,
+            'next_cursor': messages[-1].id,
+        }
+
+    return jsonify({
+        'chats': chats,
+        'denied': sorted(set(last_seen) - allowed),
+    }), 200
@@ -1,21 +1,58 @@
 import click
 import random
+import time
 from datetime import datetime, timedelta, timezone
 from flask.cli import with_appcontext
 from extensions import db
 from models import User, Chat, Message
+from seeding import bulk_seed, refresh_chat_activity, validate_sizes, DEFAULT_PASSWORD
 from werkzeug.security import generate_password_hash
 
 @click.command(name='seed_db')
+@click.option('--users', type=int, default=0,
+              help='Bulk mode: number of generated users (default: small demo dataset).')
+@click.option('--chats-per-user', type=int, default=10, show_default=True,
+              help='Bulk mode: approximate 1-on-1 chats per user.')
+@click.option('--messages-per-chat', type=int, default=50, show_default=True,
+              help='Bulk mode: messages per chat.')
+@click.option('--days', type=int, default=30, show_default=True,
+              help='Bulk mode: time span covered by message timestamps.')
+@click.option('--seed', 'rng_seed', type=int, default=42, show_default=True,
+              help='Bulk mode: RNG seed (same seed and sizes give the same data).')
+@click.option('--batch-size', type=int, default=10000, show_default=True,
+              help='Bulk mode: rows per insert/COPY batch.')
 @with_appcontext
-def seed_db_command():
+def seed_db_command(users, chats_per_user, messages_per_chat, days, rng_seed, batch_size):
     """Populates the database with clean, chronological dummy data."""
 
+    # Reject impossible sizes before anything is dropped
+    if users:
+        try:
+            validate_sizes(users, chats_per_user)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint='--users / --chats-per-user')
+
     # 1. Clear existing data
     db.drop_all()
     db.create_all()
     click.echo('Initialized the database.')
 
+    if users:
+        # Capacity-testing data: streamed batches, bounded memory
+        started = time.perf_counter()
+        bulk_seed(
+            users,
+            chats_per_user=chats_per_user,
+            messages_per_chat=messages_per_chat,
+            days=days,
+            rng_seed=rng_seed,
+            batch_size=batch_size,
+            progress=lambda table, count: click.echo(f'Inserted {count} {table}.')
+        )
+        click.echo(f'Bulk seeding completed in {time.perf_counter() - started:.1f}s '
+                   f'(password: "{DEFAULT_PASSWORD}").')
+        return
+
     # 2. Create Core Users
     password = generate_password_hash('password')
 
@@ -43,22 +80,15 @@ def seed_db_command():
 
     # 3. Create Chats
     # Chat 1: Alice & Bob (Main conversation)
-    chat1 = Chat()
-    chat1.participants.append(alice)
-    chat1.participants.append(bob)
+    chat1 = Chat.create_direct(alice, bob)
 
     # Chat 2: Alice & Charlie
-    chat2 = Chat()
-    chat2.participants.append(alice)
-    chat2.participants.append(charlie)
+    chat2 = Chat.create_direct(alice, charlie)
 
     # Create random chats for Alice to test scrolling
     random_chats = []
     for u in extra_users:
-        c = Chat()
-        c.participants.append(alice)
-        c.participants.append(u)
-        random_chats.append(c)
+        random_chats.append(Chat.create_direct(alice, u))
 
     db.session.add_all([chat1, chat2] + random_chats)
     db.session.commit()
@@ -132,6 +162,8 @@ def seed_db_command():
     messages.sort(key=lambda x: x.timestamp)
 
     db.session.add_all(messages)
+    db.session.flush()
+    refresh_chat_activity()
     db.session.commit()
 
     click.echo(f'Added {len(messages)} sample messages with correct timestamps.')
@@ -0,0 +1,74 @@
+import gzip
+from flask import request
+
+try:
+    import brotli  # Optional dependency: without it only gzip is offered
+except ImportError:
+    brotli = None
+
+# Response compression negotiated from Accept-Encoding.
+# JSON bodies (history pages especially) are repetitive and shrink several
+# times over; small bodies are left alone because the framing costs more than
+# it saves. Socket.IO traffic does not pass through here.
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/css', 'application/javascript'}
+
+
+def _compress(encoding, data, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESSION_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESSION_GZIP_LEVEL'], mtime=0)
+
+
+def choose_encoding(accept_encodings, algorithms):
+    """
+    Picks the client's most preferred encoding among `algorithms`
+    (server order breaks ties). Returns None if none is acceptable.
+    """
+    best, best_quality = None, 0
+    for encoding in algorithms:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def init_compression(app):
+    """
+    Compresses eligible responses in an after_request hook. Register it after
+    the other hooks so it runs first and the request timing includes it.
+    """
+    algorithms = [
+        name.strip() for name in app.config['COMPRESSION_ALGORITHMS'].split(',')
+        if name.strip() == 'gzip' or (name.strip() == 'br' and brotli is not None)
+    ]
+    if not algorithms:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+
+        if (
+            response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or (response.content_length or 0) < app.config['COMPRESSION_MIN_SIZE']
+        ):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings, algorithms)
+        if encoding is None:
+            return response
+
+        response.set_data(_compress(encoding, response.get_data(), app.config))
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes differ from the identity ones: weaken a strong
+        # ETag so it still validates (If-None-Match uses weak comparison).
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
@@ -0,0 +1,38 @@
+import hashlib
+from flask import current_app, request
+
+# Conditional GETs (ETag / If-None-Match) for responses that are re-fetched
+# often but change rarely. ETags are derived from version markers kept by the
+# writes themselves (chats.history_version, the cached profile) or from the
+# rows a page query has already read (the chat list), so checking one never
+# builds or encodes the response.
+# Responses are per user: `private` keeps shared caches out, and
+# `Vary: Authorization` keeps a browser from reusing another account's copy.
+
+
+def make_etag(*parts):
+    """Short opaque ETag from the values that determine a response."""
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:24]
+
+
+def _cache_headers(response, etag, max_age):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
+
+
+def not_modified(etag, max_age=0):
+    """A 304 response if the client already holds `etag`, else None."""
+    if request.if_none_match.contains_weak(etag):
+        return _cache_headers(current_app.response_class(status=304), etag, max_age)
+    return None
+
+
+def with_etag(response, etag, max_age=0):
+    """
+    Adds the validators to a fresh response. max_age=0 means "revalidate every
+    time" (cheap thanks to the ETag); longer lifetimes suit content that only
+    changes on rare edits, which clients also learn about over Socket.IO.
+    """
+    return _cache_headers(response, etag, max_age)
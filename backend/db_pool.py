@@ -0,0 +1,80 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts take and how often they time out.
+    The timing covers waiting for a free connection plus pre-ping / reconnects,
+    i.e. everything a request spends before it can run its first statement.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.timeouts = 0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_seconds_total += elapsed
+                self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+
+def build_engine_options(config):
+    """
+    Engine options for SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings.
+    Sizing only applies to server databases: SQLite uses its own
+    single-connection pools and rejects pool_size/max_overflow.
+    """
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+
+    return options
+
+
+def pool_stats(engine):
+    """Snapshot of the engine's pool usage for the metrics endpoint."""
+    pool = engine.pool
+    stats = {}
+
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            stats.update(
+                checkouts_total=pool.checkouts,
+                checkout_seconds_total=pool.checkout_seconds_total,
+                checkout_seconds_max=pool.checkout_seconds_max,
+                timeouts_total=pool.timeouts,
+            )
+
+    return stats
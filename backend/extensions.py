@@ -1,10 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from flask_socketio import SocketIO
 from flasgger import Swagger
 
 # Initialize extensions separately to avoid circular imports
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+socketio = SocketIO()
 swagger = Swagger()
\ No newline at end of file
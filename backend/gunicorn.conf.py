@@ -0,0 +1,94 @@
+"""
+Gunicorn settings, read from the environment.
+
+Worker models (GUNICORN_WORKER_CLASS):
+  - gevent (default): evented worker with gevent-websocket. Long polls and
+    sockets are greenlets, so one process holds up to
+    GUNICORN_WORKER_CONNECTIONS idle connections; psycopg2 is made
+    cooperative with psycogreen.
+  - eventlet: the same model on eventlet (pip install eventlet).
+  - gthread: N processes x M threads. Every open socket and every waiting
+    long poll holds one thread, so REST requests stall once GUNICORN_THREADS
+    clients are connected. Development or socket-free deployments only.
+
+SOCKETIO_ASYNC_MODE defaults to the async mode of the chosen worker class.
+
+More than one worker process (WEB_CONCURRENCY > 1) requires
+SOCKETIO_MESSAGE_QUEUE so events reach sockets held by other processes, and
+Socket.IO clients must use the websocket transport (or sticky sessions in
+front of the workers) because HTTP long-polling sessions are per-process.
+
+Graceful reload: `kill -HUP <master pid>` starts new workers with fresh code
+and lets old ones finish in-flight requests within GUNICORN_GRACEFUL_TIMEOUT.
+"""
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+workers = _env_int('WEB_CONCURRENCY', 1)
+# Short names for the evented workers; gevent needs gevent-websocket's worker
+# to accept WebSocket upgrades.
+WORKER_CLASSES = {
+    'gevent': 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+    'eventlet': 'eventlet',
+    'gthread': 'gthread',
+}
+ASYNC_MODES = {'gevent': 'gevent', 'eventlet': 'eventlet', 'gthread': 'threading'}
+
+worker_model = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_class = WORKER_CLASSES.get(worker_model, worker_model)
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', ASYNC_MODES.get(worker_model, 'threading'))
+# Threads per gthread worker (ignored by evented workers).
+threads = _env_int('GUNICORN_THREADS', 32)
+# Max simultaneous clients per evented (eventlet/gevent) worker.
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+# Must stay above LONG_POLL_MAX_WAIT for the gthread worker.
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# Recycle workers periodically to bound memory growth (0 disables).
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 0)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 0)
+
+# Development only: restart workers when code changes.
+reload = os.environ.get('GUNICORN_RELOAD', '0').lower() in ('1', 'true', 'yes')
+
+# The app logs each request itself; gunicorn's access log is opt-in.
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Trust X-Forwarded-* from the reverse proxy in front of the container.
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+# Prometheus multiprocess mode (see metrics.py): start from an empty sample
+# directory and drop the live gauges of workers that exit.
+def on_starting(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith('.db'):
+                os.remove(os.path.join(path, name))
+
+
+# Evented workers: let psycopg2 yield to other greenlets while it waits on
+# Postgres instead of blocking the whole process.
+def post_fork(server, worker):
+    if worker_model in ('gevent', 'eventlet'):
+        from importlib import import_module
+        import_module(f'psycogreen.{worker_model}').patch_psycopg()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,100 @@
+import logging
+import time
+from flask import g, has_app_context
+from sqlalchemy import event
+from extensions import db
+
+slow_query_logger = logging.getLogger('sql.slow')
+
+# Long statements / parameter lists are cut in the slow-query log.
+MAX_LOGGED_CHARS = 1000
+
+
+class RequestStats:
+    """Wall time and SQL usage of the current request."""
+
+    __slots__ = ('started', 'queries', 'sql_seconds', 'rows')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+    def as_fields(self):
+        return {
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'db_queries': self.queries,
+            'db_ms': round(self.sql_seconds * 1000, 2),
+            'db_rows': self.rows,
+        }
+
+
+def _truncate(value):
+    text = str(value)
+    if len(text) > MAX_LOGGED_CHARS:
+        return text[:MAX_LOGGED_CHARS] + '...'
+    return text
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(slow_query_seconds):
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+
+        stats = g.get('request_stats') if has_app_context() else None
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+            # DML always reports affected rows; SELECT row counts depend on the
+            # driver (psycopg2 reports them, sqlite3 returns -1).
+            if cursor.rowcount > 0:
+                stats.rows += cursor.rowcount
+
+        if slow_query_seconds and elapsed >= slow_query_seconds:
+            slow_query_logger.warning(
+                f"Slow query ({elapsed * 1000:.1f}ms): {_truncate(statement)} | params: {_truncate(parameters)}",
+                extra={'duration_ms': round(elapsed * 1000, 2)}
+            )
+
+    return listener
+
+
+def request_stats():
+    """Fields for the current request, or an empty dict outside a request."""
+    stats = g.get('request_stats') if has_app_context() else None
+    return stats.as_fields() if stats is not None else {}
+
+
+def init_instrumentation(app):
+    """
+    Hooks SQLAlchemy engine events and Flask request hooks so every request
+    records wall time, SQL statements, SQL time and rows. Results are exposed
+    through `request_stats()` and, when SERVER_TIMING is on, as a Server-Timing
+    header that browser dev tools display per request.
+    """
+    slow_query_ms = app.config.get('SLOW_QUERY_MS')
+    slow_query_seconds = slow_query_ms / 1000 if slow_query_ms else None
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute(slow_query_seconds))
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+
+    if app.config.get('SERVER_TIMING'):
+        @app.after_request
+        def add_server_timing(response):
+            fields = request_stats()
+            if fields:
+                response.headers['Server-Timing'] = (
+                    f"app;dur={fields['duration_ms']}, "
+                    f"db;dur={fields['db_ms']};desc=\"{fields['db_queries']} queries\""
+                )
+            return response
@@ -0,0 +1,60 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # Optional dependency: JSON_PROVIDER=auto falls back to the stdlib
+except ImportError:
+    orjson = None
+
+# Pluggable `app.json` (what jsonify and request.get_json use), selected by
+# JSON_PROVIDER: 'default' (stdlib json), 'orjson', 'auto' (orjson when
+# installed), or a JSONProvider subclass.
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson-backed provider: several times faster than the stdlib encoder on
+    message lists. Responses are built from bytes directly (no str round trip).
+    Types orjson does not know (e.g. Decimal) go through Flask's default hook;
+    datetimes it encodes itself, as ISO 8601 (routes already send isoformat()).
+    """
+
+    # Sorting keys costs time and the routes build dicts in a deliberate order
+    sort_keys = False
+
+    def _options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent)) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {'default': DefaultJSONProvider, 'orjson': OrjsonProvider}
+
+
+def init_json_provider(app):
+    choice = app.config['JSON_PROVIDER']
+    if choice == 'auto':
+        choice = 'orjson' if orjson is not None else 'default'
+
+    if isinstance(choice, str):
+        if choice not in PROVIDERS:
+            raise ValueError(f'Unknown JSON_PROVIDER: {choice!r}')
+        if choice == 'orjson' and orjson is None:
+            raise ImportError('JSON_PROVIDER=orjson requires the orjson package')
+        choice = PROVIDERS[choice]
+
+    app.json = choice(app)
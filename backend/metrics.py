@@ -0,0 +1,156 @@
+import os
+import time
+from flask import Blueprint, Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from extensions import db
+from db_pool import pool_stats
+
+# Prometheus exposition endpoint for scraping.
+# Base URL: /metrics (not under /api: scraped by infrastructure, not the client)
+bp = Blueprint('metrics', __name__)
+
+# With several Gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory: every process writes its samples there and a scrape of any
+# worker aggregates all of them (see gunicorn.conf.py for cleanup).
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+# Long polls are included, so the buckets reach LONG_POLL_MAX_WAIT.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.',
+    ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled.',
+    multiprocess_mode='livesum'
+)
+MESSAGES_SENT = Counter('messages_sent', 'Messages sent through the REST API.')
+SOCKET_CONNECTIONS = Gauge(
+    'socketio_connections', 'Authenticated Socket.IO connections.',
+    multiprocess_mode='livesum'
+)
+
+# Process-local stats (pool, caches) are copied into metrics after requests,
+# at most once per SNAPSHOT_INTERVAL, so every worker contributes to the sum.
+# Levels become gauges. Running totals become counters advanced by their growth
+# since the last snapshot, so they never drop when a worker is recycled and
+# rate() works across restarts.
+SNAPSHOT_INTERVAL = 1.0
+
+# pool_stats key -> metric
+POOL_GAUGES = {
+    'size': Gauge('db_pool_size', 'Configured number of persistent connections.', multiprocess_mode='livesum'),
+    'checked_out': Gauge('db_pool_checked_out', 'Connections currently in use.', multiprocess_mode='livesum'),
+    'checked_in': Gauge('db_pool_checked_in', 'Idle connections in the pool.', multiprocess_mode='livesum'),
+    'overflow': Gauge('db_pool_overflow', 'Connections open beyond pool_size.', multiprocess_mode='livesum'),
+    'checkout_seconds_max': Gauge(
+        'db_pool_checkout_seconds_max', 'Slowest connection checkout since start.', multiprocess_mode='max'
+    ),
+}
+POOL_COUNTERS = {
+    'checkouts_total': Counter('db_pool_checkouts', 'Connection checkouts.'),
+    'checkout_seconds_total': Counter('db_pool_checkout_seconds', 'Total time spent acquiring connections.'),
+    'timeouts_total': Counter('db_pool_timeouts', 'Checkouts that hit pool_timeout.'),
+}
+
+CACHE_GAUGES = {
+    'size': Gauge('membership_cache_size', 'Entries in the membership cache.', multiprocess_mode='livesum'),
+}
+CACHE_COUNTERS = {
+    'hits': Counter('membership_cache_hits', 'Membership cache hits.'),
+    'misses': Counter('membership_cache_misses', 'Membership cache misses.'),
+}
+
+PROFILE_CACHE_COUNTERS = {
+    'hits': Counter('profile_cache_hits', 'Profile cache hits.'),
+    'misses': Counter('profile_cache_misses', 'Profile cache misses.'),
+}
+
+_last_snapshot = 0.0
+
+
+def _advance(app, name, counter, total):
+    """Adds the growth of a process-local running total since the last snapshot."""
+    seen = app.extensions.setdefault('metrics_totals', {})
+    previous = seen.get(name, 0)
+    # A total below the last one means the stats were reset: count it from zero
+    counter.inc(total - previous if total >= previous else total)
+    seen[name] = total
+
+
+def _snapshot_process_stats(app):
+    for key, value in pool_stats(db.engine).items():
+        if key in POOL_COUNTERS:
+            _advance(app, f'db_pool_{key}', POOL_COUNTERS[key], value)
+        else:
+            POOL_GAUGES[key].set(value)
+
+    cache_stats = app.extensions['membership_cache'].stats()
+    for key, gauge in CACHE_GAUGES.items():
+        gauge.set(cache_stats[key])
+    for key, counter in CACHE_COUNTERS.items():
+        _advance(app, f'membership_cache_{key}', counter, cache_stats[key])
+
+    profile_stats = app.extensions['profile_cache'].stats()
+    for key, counter in PROFILE_CACHE_COUNTERS.items():
+        _advance(app, f'profile_cache_{key}', counter, profile_stats[key])
+
+
+def init_metrics(app):
+    """Registers the request hooks that feed the latency and in-flight metrics."""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        global _last_snapshot
+
+        started = g.get('metrics_started')
+        if started is not None:
+            REQUEST_LATENCY.labels(
+                request.method,
+                # Unmatched URLs share one label so 404 scans can't blow up cardinality
+                request.endpoint or 'unmatched',
+                response.status_code
+            ).observe(time.perf_counter() - started)
+
+        now = time.monotonic()
+        if now - _last_snapshot >= SNAPSHOT_INTERVAL:
+            _last_snapshot = now
+            _snapshot_process_stats(app)
+
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if g.pop('metrics_started', None) is not None:
+            REQUESTS_IN_PROGRESS.dec()
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Metrics in Prometheus text format, aggregated across worker processes.
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Prometheus exposition text
+    """
+    _snapshot_process_stats(current_app)
+
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,63 @@
+"""message search
+
+Revision ID: 01f5138dd591
+Revises: 75ee8eaf9bed
+Create Date: 2026-10-17 13:23:33.627600
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '01f5138dd591'
+down_revision = '75ee8eaf9bed'
+branch_labels = None
+depends_on = None
+
+
+# Full-text index objects (see search.py); not part of the models.
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, chat_id, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts (rowid, content, chat_id) VALUES (new.id, new.content, new.chat_id); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, chat_id) "
+    "VALUES ('delete', old.id, old.content, old.chat_id); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, chat_id) "
+    "VALUES ('delete', old.id, old.content, old.chat_id); "
+    "INSERT INTO messages_fts (rowid, content, chat_id) VALUES (new.id, new.content, new.chat_id); END",
+    # Index the existing messages
+    "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS messages_fts_update",
+    "DROP TRIGGER IF EXISTS messages_fts_delete",
+    "DROP TRIGGER IF EXISTS messages_fts_insert",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+POSTGRES_UPGRADE = [
+    # Computes the vector for every existing row (rewrites the table once)
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_messages_search_vector ON messages USING gin (search_vector)",
+]
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_messages_search_vector",
+    "ALTER TABLE messages DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade():
+    _run({'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE})
+
+
+def downgrade():
+    _run({'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE})
@@ -5,7 +5,28 @@ from extensions import db
 user_chat_association = db.Table(
     'participants',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('chat_id', db.Integer, db.ForeignKey('chats.id'), primary_key=True)
+    db.Column('chat_id', db.Integer, db.ForeignKey('chats.id'), primary_key=True),
+    # Per-member read state: the read cursor and how many of the chat's messages
+    # it covers. Unread is chats.message_count - read_count, so a new message
+    # never writes the other members' rows (see Chat.record_message).
+    db.Column('last_read_message_id', db.Integer, nullable=True),
+    db.Column('read_count', db.Integer, nullable=False, default=0, server_default='0'),
+    # Copy of chats.is_group, so the chat list can range scan a user's direct
+    # chats and their groups separately.
+    db.Column('is_group', db.Boolean, nullable=False, default=False, server_default=db.false()),
+    # Copy of chats.last_activity for 1-on-1 chats (both rows are written on every
+    # message): their chat list is an index range scan on (user_id, is_group,
+    # last_activity) instead of a sort over all the user's chats. Groups are
+    # ordered by chats.last_activity instead, so their members are never fanned out to.
+    db.Column('last_activity', db.DateTime, nullable=True, default=lambda: datetime.now(timezone.utc)),
+    # Bumped by writes that change what this member's chat list shows without
+    # touching the row's other columns (membership or partner profile changes);
+    # part of the hashed page rows that make the chat list ETag.
+    db.Column('version', db.Integer, nullable=False, default=0, server_default='0'),
+    db.Index('ix_participants_user_activity', 'user_id', 'is_group', 'last_activity', 'chat_id'),
+    # Chat -> members lookups (partner join, membership fan-out); the primary
+    # key leads with user_id and cannot serve them.
+    db.Index('ix_participants_chat_user', 'chat_id', 'user_id')
 )
 
 
@@ -19,6 +40,8 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
+    # Embedded in access tokens as `ver`; bumping it revokes every issued token.
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     chats = db.relationship(
@@ -47,6 +70,34 @@ class Chat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    # Canonical participant pair for 1-on-1 chats (smaller user id first).
+    # The unique index turns "find the chat between A and B" into a single probe
+    # and prevents concurrent requests from creating duplicate chats.
+    direct_low_id = db.Column(db.Integer, nullable=True)
+    direct_high_id = db.Column(db.Integer, nullable=True)
+
+    # Denormalized pointer to the newest message (preview) and its time (sidebar order).
+    # No FK: it would make chats and messages reference each other.
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_activity = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Group chats: a name, an owner who may remove other members, and a
+    # denormalized member count so the chat list never counts participant rows.
+    is_group = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    name = db.Column(db.String(100), nullable=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Live messages in the chat; with participants.read_count it gives unread counts.
+    message_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Bumped when an existing message is edited or deleted: older history pages
+    # only change then, so (chat, page, history_version) is their ETag.
+    history_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_chats_direct_pair', 'direct_low_id', 'direct_high_id', unique=True),
+    )
+
     # Relationships
     participants = db.relationship(
         'User',
@@ -62,6 +113,296 @@ class Chat(db.Model):
         cascade="all, delete-orphan"
     )
 
+    @staticmethod
+    def has_participant(chat_id, user_id):
+        """
+        Membership check as an existence probe on the participants primary key.
+        No User rows are loaded, so the cost does not grow with the chat size.
+        """
+        return db.session.query(
+            db.exists().where(
+                user_chat_association.c.user_id == user_id,
+                user_chat_association.c.chat_id == chat_id
+            )
+        ).scalar()
+
+    @staticmethod
+    def membership(chat_id, user_id):
+        """
+        (is_member, is_group) for an existing chat, or None if it does not exist.
+        One primary key lookup plus the same existence probe as has_participant.
+        """
+        is_member = db.exists().where(
+            user_chat_association.c.user_id == user_id,
+            user_chat_association.c.chat_id == chat_id
+        )
+        return db.session.execute(
+            db.select(is_member.label('is_member'), Chat.is_group).where(Chat.id == chat_id)
+        ).one_or_none()
+
+    @staticmethod
+    def direct_pair(user_a_id, user_b_id):
+        """Returns the canonical (low, high) key for a 1-on-1 chat."""
+        return min(user_a_id, user_b_id), max(user_a_id, user_b_id)
+
+    @classmethod
+    def create_direct(cls, user_a, user_b):
+        """Builds a 1-on-1 chat between two persisted users (not added to the session)."""
+        # Reading ids of expired users must not autoflush chats still being built.
+        with db.session.no_autoflush:
+            low_id, high_id = cls.direct_pair(user_a.id, user_b.id)
+        chat = cls(direct_low_id=low_id, direct_high_id=high_id, member_count=2)
+        chat.participants.append(user_a)
+        chat.participants.append(user_b)
+        return chat
+
+    @staticmethod
+    def record_message(message):
+        """
+        Updates the denormalized chat state for a new (flushed) message: last
+        message, activity and message count on the chat, and the author's read
+        cursor (replying implies having read the chat). In 1-on-1 chats the
+        partner's row also gets the new activity; group members' rows are not
+        written, so a send costs the same whatever the group size.
+        Runs in the caller's transaction.
+        """
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id == message.chat_id)
+            .values(
+                last_message_id=message.id, last_activity=message.timestamp,
+                message_count=Chat.message_count + 1
+            )
+        )
+        members = user_chat_association.c
+        is_author = members.user_id == message.user_id
+        message_count = db.select(Chat.message_count).where(Chat.id == message.chat_id).scalar_subquery()
+        db.session.execute(
+            db.update(user_chat_association)
+            .where(members.chat_id == message.chat_id, db.or_(is_author, members.is_group.is_(False)))
+            .values(
+                last_activity=message.timestamp,
+                last_read_message_id=db.case((is_author, message.id), else_=members.last_read_message_id),
+                read_count=db.case((is_author, message_count), else_=members.read_count)
+            )
+        )
+
+    @staticmethod
+    def forget_message(message):
+        """
+        Reverses record_message for a message about to be deleted: the chat has
+        one message less, members whose read cursor covers it have read one less
+        (so nobody's unread count changes unless they had not read it), and the
+        preview moves to the previous message.
+        """
+        members = user_chat_association.c
+        db.session.execute(
+            db.update(user_chat_association)
+            .where(members.chat_id == message.chat_id, members.last_read_message_id >= message.id)
+            .values(read_count=members.read_count - 1)
+        )
+
+        previous_id = (
+            db.select(db.func.max(Message.id))
+            .where(Message.chat_id == message.chat_id, Message.id != message.id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id == message.chat_id)
+            .values(
+                last_message_id=db.case(
+                    (Chat.last_message_id == message.id, previous_id), else_=Chat.last_message_id
+                ),
+                message_count=Chat.message_count - 1,
+                history_version=Chat.history_version + 1
+            )
+        )
+
+    @staticmethod
+    def record_edit(message):
+        """
+        Marks the chat's history as changed after an edit. The chat list needs
+        nothing: a changed preview changes its hashed rows.
+        """
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id == message.chat_id)
+            .values(history_version=Chat.history_version + 1)
+        )
+
+    @staticmethod
+    def mark_read(chat_id, user_id, message_id):
+        """
+        Moves the member's read cursor forward to message_id (never backwards)
+        and derives read_count from the messages still after it, with one range
+        scan over the unread tail. Returns (last_read_message_id, unread_count).
+        """
+        members = user_chat_association.c
+        unread_after = (
+            db.select(db.func.count())
+            .select_from(Message)
+            .where(Message.chat_id == chat_id, Message.id > message_id)
+            .scalar_subquery()
+        )
+        message_count = db.select(Chat.message_count).where(Chat.id == chat_id).scalar_subquery()
+        db.session.execute(
+            db.update(user_chat_association)
+            .where(
+                members.chat_id == chat_id,
+                members.user_id == user_id,
+                db.or_(members.last_read_message_id.is_(None), members.last_read_message_id < message_id)
+            )
+            .values(last_read_message_id=message_id, read_count=message_count - unread_after)
+        )
+        return db.session.execute(
+            db.select(members.last_read_message_id, Chat.message_count - members.read_count)
+            .select_from(user_chat_association)
+            .join(Chat, Chat.id == members.chat_id)
+            .where(members.chat_id == chat_id, members.user_id == user_id)
+        ).one()
+
+    @classmethod
+    def insert_direct(cls, user_a_id, user_b_id):
+        """
+        Adds a 1-on-1 chat and its two participant rows by user id, without
+        loading User rows. Flushes; the caller commits.
+        """
+        low_id, high_id = cls.direct_pair(user_a_id, user_b_id)
+        chat = cls(direct_low_id=low_id, direct_high_id=high_id, member_count=2)
+        db.session.add(chat)
+        db.session.flush()
+        db.session.execute(user_chat_association.insert(), [
+            {'user_id': low_id, 'chat_id': chat.id},
+            {'user_id': high_id, 'chat_id': chat.id},
+        ])
+        return chat
+
+    @classmethod
+    def insert_group(cls, owner_id, name, member_ids):
+        """
+        Adds a group chat owned by owner_id with the given members (the owner
+        included). Flushes; the caller commits.
+        """
+        chat = cls(is_group=True, name=name, owner_id=owner_id)
+        db.session.add(chat)
+        db.session.flush()
+        cls.add_members(chat, [owner_id, *member_ids])
+        return chat
+
+    @staticmethod
+    def add_members(chat, user_ids):
+        """
+        Inserts participant rows for the given (existing) users who are not yet
+        members, in one batched INSERT, and bumps member_count.
+        New members start with everything so far marked as read.
+        Returns the ids that were added.
+        """
+        members = user_chat_association.c
+        user_ids = list(dict.fromkeys(user_ids))
+        existing = set(db.session.execute(
+            db.select(members.user_id)
+            .where(members.chat_id == chat.id, members.user_id.in_(user_ids))
+        ).scalars())
+        added = [user_id for user_id in user_ids if user_id not in existing]
+        if not added:
+            return added
+
+        db.session.execute(user_chat_association.insert(), [
+            {'user_id': user_id, 'chat_id': chat.id, 'last_read_message_id': chat.last_message_id,
+             'read_count': chat.message_count, 'is_group': chat.is_group, 'last_activity': chat.last_activity}
+            for user_id in added
+        ])
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id == chat.id)
+            .values(member_count=Chat.member_count + len(added))
+        )
+        Chat.touch_members([chat.id])
+        return added
+
+    @staticmethod
+    def remove_members(chat_id, user_ids):
+        """
+        Deletes the given participant rows and lowers member_count by the number
+        actually removed. If the owner leaves, ownership passes to the remaining
+        member with the lowest id. Returns how many members were removed.
+        """
+        members = user_chat_association.c
+        removed = db.session.execute(
+            db.delete(user_chat_association)
+            .where(members.chat_id == chat_id, members.user_id.in_(user_ids))
+        ).rowcount
+        if removed:
+            db.session.execute(
+                db.update(Chat)
+                .where(Chat.id == chat_id)
+                .values(member_count=Chat.member_count - removed)
+            )
+            db.session.execute(
+                db.update(Chat)
+                .where(Chat.id == chat_id, Chat.owner_id.in_(user_ids))
+                .values(owner_id=Chat.successor_owner(user_ids))
+            )
+            Chat.touch_members([chat_id])
+        return removed
+
+    @staticmethod
+    def touch_members(chat_ids):
+        """
+        Bumps the version of every member row in the given chats (a list or a
+        select of chat ids), so their chat list ETags change. Used for changes
+        that do not otherwise write the rows: member counts, partner profiles.
+        """
+        members = user_chat_association.c
+        db.session.execute(
+            db.update(user_chat_association)
+            .where(members.chat_id.in_(chat_ids))
+            .values(version=members.version + 1)
+        )
+
+    @staticmethod
+    def chats_of(user_id):
+        """Select of the ids of the chats user_id is in (for IN clauses)."""
+        members = user_chat_association.c
+        return db.select(members.chat_id).where(members.user_id == user_id)
+
+    @staticmethod
+    def forget_user(user_id):
+        """
+        Set-based cleanup before an account is deleted: every chat the user is
+        in loses one member, groups they own pass to the next member, and every
+        chat they ever posted in (left ones included) gets a new history_version
+        because their messages lose their author.
+        """
+        Chat.touch_members(Chat.chats_of(user_id))
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id.in_(Chat.chats_of(user_id)))
+            .values(member_count=Chat.member_count - 1)
+        )
+        posted_in = db.select(Message.chat_id).where(Message.user_id == user_id).distinct()
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.id.in_(posted_in))
+            .values(history_version=Chat.history_version + 1)
+        )
+        db.session.execute(
+            db.update(Chat)
+            .where(Chat.owner_id == user_id)
+            .values(owner_id=Chat.successor_owner([user_id]))
+        )
+
+    @staticmethod
+    def successor_owner(leaving_ids):
+        """Correlated subquery: lowest remaining member id of the updated chat."""
+        members = user_chat_association.c
+        return (
+            db.select(db.func.min(members.user_id))
+            .where(members.chat_id == Chat.id, members.user_id.not_in(leaving_ids))
+            .scalar_subquery()
+        )
+
     def __repr__(self):
         return f'<Chat {self.id}>'
 
@@ -81,6 +422,15 @@ class Message(db.Model):
 
     chat_id = db.Column(db.Integer, db.ForeignKey('chats.id'), nullable=False)
 
+    # History pages and polling filter by chat and order by id:
+    # this index makes every page a range scan instead of a sort.
+    # The user_id index serves account deletion (ON DELETE SET NULL and the
+    # chats whose history changes, see Chat.forget_user).
+    __table_args__ = (
+        db.Index('ix_messages_chat_id_id', 'chat_id', 'id'),
+        db.Index('ix_messages_user_id_chat_id', 'user_id', 'chat_id'),
+    )
+
     def to_dict(self):
         """Helper to serialize message data for API responses."""
         return {
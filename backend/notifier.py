@@ -0,0 +1,54 @@
+import threading
+from contextlib import contextmanager
+from flask import current_app
+
+
+class LocalNotifier:
+    """
+    In-process stand-in for a "new message in chat X" notifier used by long polling.
+
+    Waiters block on a per-chat Event. Under an evented worker (eventlet/gevent)
+    the threading primitives are monkey-patched into green ones, so a sleeping
+    long-poll costs neither an OS thread nor a DB connection.
+    Wake-ups only reach waiters in the same process: a waiter in another process
+    simply sleeps until its timeout and then re-queries, which is still correct.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}  # chat_id -> set of threading.Event
+
+    @contextmanager
+    def listen(self, chat_id):
+        """
+        Registers a waiter for chat_id and yields its Event.
+        Register BEFORE querying, so a message committed between the query and
+        the wait still sets the Event (no lost wake-ups).
+        """
+        event = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(chat_id, set()).add(event)
+        try:
+            yield event
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(chat_id)
+                if waiters is not None:
+                    waiters.discard(event)
+                    if not waiters:
+                        del self._waiters[chat_id]
+
+    def notify(self, chat_id):
+        """Wakes every request currently waiting on chat_id."""
+        with self._lock:
+            waiters = list(self._waiters.get(chat_id, ()))
+        for event in waiters:
+            event.set()
+
+
+def init_notifier(app):
+    app.extensions['message_notifier'] = LocalNotifier()
+
+
+def get_notifier():
+    return current_app.extensions['message_notifier']
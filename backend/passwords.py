@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued; callers answer 503."""
+
+
+class _TpoolExecutor:
+    """eventlet.tpool behind the submit() interface, capped at max_workers."""
+
+    def __init__(self, max_workers):
+        from eventlet import tpool
+        from eventlet.semaphore import Semaphore
+        self._execute = tpool.execute
+        self._workers = Semaphore(max_workers)
+
+    def submit(self, fn, *args):
+        future = Future()
+        with self._workers:
+            try:
+                future.set_result(self._execute(fn, *args))
+            except BaseException as exc:
+                future.set_exception(exc)
+        return future
+
+
+def _make_executor(async_mode, workers):
+    """
+    A pool of real OS threads for the server's async mode. Under gevent and
+    eventlet the monkey-patched stdlib pool would run hashes on greenlets,
+    blocking the whole worker for the length of each hash.
+    """
+    if async_mode == 'gevent':
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor(max_workers=workers)
+    if async_mode == 'eventlet':
+        return _TpoolExecutor(workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, bounded thread pool.
+
+    scrypt and pbkdf2 (hashlib) release the GIL, so hashing runs in parallel
+    with the worker's other threads (or greenlets, see `_make_executor`) while
+    the request just waits for the result. `workers` caps how many cores
+    hashing may burn at once, and `max_pending` caps the backlog: when a login
+    storm exceeds it, new attempts fail fast instead of starving messaging
+    requests.
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=32, async_mode='threading'):
+        self.method = method
+        self._executor = _make_executor(async_mode, workers)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._prefix = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        # Released by the caller once it has the result: a done callback may run
+        # after result() returns, making the caller's next hash look busy.
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with another method or cost."""
+        if self._prefix is None:
+            # Werkzeug expands e.g. 'scrypt' to 'scrypt:32768:8:1'; hash once
+            # to learn the exact prefix the current settings produce.
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+
+def init_password_hasher(app):
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        async_mode=app.config['SOCKETIO_ASYNC_MODE']
+    )
+
+
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,192 @@
+import socketio as python_socketio
+from flask import request
+from flask_jwt_extended import decode_token
+from flask_socketio import join_room, leave_room
+from extensions import socketio
+from models import Chat
+from metrics import SOCKET_CONNECTIONS
+from tokens import is_token_revoked
+
+# Socket.IO session id -> authenticated user id.
+# Populated on connect so event handlers never decode the JWT again.
+connected_users = {}
+
+
+def chat_room(chat_id):
+    """Name of the Socket.IO room that receives events for a chat."""
+    return f'chat_{chat_id}'
+
+
+def user_room(user_id):
+    """Name of the Socket.IO room holding every socket of a user (on this process)."""
+    return f'user_{user_id}'
+
+
+# --- Client managers: per-user socket actions that reach every process ---
+
+class _UserActions:
+    """
+    Actions on all sockets of a user, wherever they are connected. Each process
+    finds its own sockets of the user through their user room. Commands are
+    encoded as control room names (see _relay) and applied by _apply.
+    """
+
+    def evict_user(self, user_id, chat_id):
+        """Removes the user's sockets from the chat room."""
+        self._relay(f'~evict:{chat_id}:{user_id}')
+
+    def disconnect_user(self, user_id):
+        """Closes every socket of the user."""
+        self._relay(f'~disconnect:{user_id}')
+
+    def _relay(self, command):
+        self._apply(command)
+
+    def _apply(self, command):
+        """Runs a command on this process's sockets; False if it is not a command."""
+        action, *ids = (command or '').split(':')
+        if action == '~evict':
+            chat_id, user_id = map(int, ids)
+            for sid, _ in list(self.get_participants('/', user_room(user_id))):
+                self.leave_room(sid, '/', chat_room(chat_id))
+        elif action == '~disconnect':
+            user_id, = map(int, ids)
+            for sid, _ in list(self.get_participants('/', user_room(user_id))):
+                self.server.disconnect(sid, namespace='/', ignore_queue=True)
+        else:
+            return False
+        return True
+
+
+class _RelayedUserActions(_UserActions):
+    """
+    For the message queue managers: commands travel as close_room messages,
+    which every process receives (this one included) and which a process
+    without these actions treats as closing an empty room.
+    """
+
+    def _relay(self, command):
+        self.close_room(command, namespace='/')
+
+    def _handle_close_room(self, message):
+        if not self._apply(message.get('room')):
+            super()._handle_close_room(message)
+
+
+class LocalManager(_UserActions, python_socketio.Manager):
+    """Single-process client manager (no SOCKETIO_MESSAGE_QUEUE)."""
+
+
+def make_client_manager(url, channel='flask-socketio'):
+    """
+    The client manager for SOCKETIO_MESSAGE_QUEUE, chosen by URL scheme as
+    Flask-SocketIO does, extended with the per-user actions.
+    """
+    if not url:
+        return LocalManager()
+    if url.startswith(('redis://', 'rediss://')):
+        queue_class = python_socketio.RedisManager
+    elif url.startswith('kafka://'):
+        queue_class = python_socketio.KafkaManager
+    elif url.startswith('zmq'):
+        queue_class = python_socketio.ZmqManager
+    else:
+        queue_class = python_socketio.KombuManager
+    manager_class = type(queue_class.__name__, (_RelayedUserActions, queue_class), {})
+    return manager_class(url, channel=channel)
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """
+    Authenticate the socket with the same JWT used for REST calls.
+    The token is read from the Socket.IO auth payload ({"token": "..."})
+    or from the `token` query parameter. Returning False rejects the connection.
+    """
+    token = (auth or {}).get('token') or request.args.get('token')
+    if not token:
+        return False
+
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return False
+
+    if is_token_revoked(None, claims):
+        return False
+
+    user_id = int(claims['sub'])
+    connected_users[request.sid] = user_id
+    join_room(user_room(user_id))
+    SOCKET_CONNECTIONS.inc()
+    return True
+
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    if connected_users.pop(request.sid, None) is not None:
+        SOCKET_CONNECTIONS.dec()
+
+
+@socketio.on('join_chat')
+def handle_join_chat(data):
+    """
+    Subscribe the socket to a chat room after verifying membership.
+    Returns an acknowledgement dict to the client.
+    """
+    user_id = connected_users.get(request.sid)
+    chat_id = (data or {}).get('chat_id')
+
+    if user_id is None:
+        return {'error': 'Not authenticated'}
+
+    if not isinstance(chat_id, int):
+        return {'error': 'Chat ID is required'}
+
+    if not Chat.has_participant(chat_id, user_id):
+        return {'error': 'Access denied'}
+
+    join_room(chat_room(chat_id))
+    return {'ok': True, 'chat_id': chat_id}
+
+
+@socketio.on('leave_chat')
+def handle_leave_chat(data):
+    chat_id = (data or {}).get('chat_id')
+    if isinstance(chat_id, int):
+        leave_room(chat_room(chat_id))
+    return {'ok': True}
+
+
+# --- Server-side broadcast helpers (called from REST routes) ---
+
+def evict_from_chat(user_id, chat_id):
+    """
+    Unsubscribes a removed member's sockets from the chat room so they stop
+    receiving its events, on every process sharing SOCKETIO_MESSAGE_QUEUE.
+    """
+    socketio.server.manager.evict_user(user_id, chat_id)
+
+
+def disconnect_user(user_id):
+    """
+    Closes the user's sockets on every process, once their tokens are revoked
+    (logout-all, account deletion): the token was only checked on connect.
+    """
+    socketio.server.manager.disconnect_user(user_id)
+
+
+def broadcast_new_message(message):
+    socketio.emit('new_message', message.to_dict(), to=chat_room(message.chat_id))
+
+
+def broadcast_message_edited(message):
+    socketio.emit('message_edited', message.to_dict(), to=chat_room(message.chat_id))
+
+
+def broadcast_message_deleted(message_id, chat_id):
+    socketio.emit(
+        'message_deleted',
+        {'id': message_id, 'chat_id': chat_id},
+        to=chat_room(chat_id)
+    )
@@ -0,0 +1,147 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from instrumentation import request_stats
+
+# Attributes every LogRecord has; anything else was passed via `extra=`.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the request thread: when the queue is full the record is dropped and counted."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps every record logged while handling a request with its request id."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id') and has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+_listener = None
+_listener_pid = None
+
+
+def configure_logging(config):
+    """
+    Routes the root logger through a bounded in-memory queue. A background
+    listener thread does the formatting and the (blocking) write to stderr,
+    so request threads only pay for an enqueue. Safe to call once per app;
+    the listener is started once per process.
+    """
+    global _listener, _listener_pid
+
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    stream_handler = logging.StreamHandler()
+    if config['LOG_FORMAT'] == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+
+    root = logging.getLogger()
+    # Replace the handler of a listener inherited through fork() (its thread is gone)
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+
+    log_queue = queue.Queue(maxsize=config['LOG_QUEUE_SIZE'])
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(config['LOG_LEVEL'])
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_listener.stop)
+
+
+def _current_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # Endpoint is not JWT-protected
+        return None
+
+
+def _sample_rate(response, poll_sample_rate):
+    """Successful after_id polls are logged at LOG_POLL_SAMPLE_RATE; everything else always."""
+    if response.status_code < 400 and request.endpoint == 'chat.get_messages' and 'after_id' in request.args:
+        return poll_sample_rate
+    return 1.0
+
+
+def init_request_logging(app):
+    """Request ids (X-Request-ID) and one structured log record per request."""
+    poll_sample_rate = app.config['LOG_POLL_SAMPLE_RATE']
+
+    @app.before_request
+    def assign_request_id():
+        # Reuse the id from a proxy in front of us so log lines can be correlated
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def log_request_info(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+
+        sample_rate = _sample_rate(response, poll_sample_rate)
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return response
+
+        stats = request_stats()
+        if sample_rate < 1:
+            # Lets log queries scale counts back up
+            stats['sample_rate'] = sample_rate
+        app.logger.info(
+            f"Request: {request.method} {request.path} | Status: {response.status_code}"
+            f" | {stats.get('duration_ms', 0)}ms | {stats.get('db_queries', 0)} queries"
+            f" ({stats.get('db_ms', 0)}ms)",
+            extra={
+                'request_id': request_id,
+                'user_id': _current_user_id(),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                **stats,
+            }
+        )
+        return response
@@ -0,0 +1,192 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from sqlalchemy import DDL, event
+from extensions import db
+from models import Message, user_chat_association
+
+# Full-text index over message content, maintained by the database itself so
+# every write path (routes, seeds, scripts) keeps it in sync incrementally:
+#   - SQLite: an FTS5 table `messages_fts` with external content (rowid =
+#     messages.id, no second copy of the text), updated by triggers on messages.
+#     chat_id is indexed too, so a search intersects the term postings with the
+#     caller's chats inside the index instead of joining every match.
+#   - Postgres: a generated `search_vector` tsvector column with a GIN index.
+# Neither object is part of the models: the DDL below creates them alongside
+# `messages` (db.create_all), and the message search migration does the same
+# for existing databases. A batch migration that rebuilds `messages` on SQLite
+# drops the triggers, so it must recreate them (SQLITE_CREATE).
+
+# 'simple' keeps words as written (no stemming or stop words), which works
+# for every language users write in.
+TS_CONFIG = 'simple'
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, chat_id, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts (rowid, content, chat_id) VALUES (new.id, new.content, new.chat_id); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, chat_id) "
+    "VALUES ('delete', old.id, old.content, old.chat_id); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, chat_id) "
+    "VALUES ('delete', old.id, old.content, old.chat_id); "
+    "INSERT INTO messages_fts (rowid, content, chat_id) VALUES (new.id, new.content, new.chat_id); END",
+]
+SQLITE_DROP = ["DROP TABLE IF EXISTS messages_fts"]
+POSTGRES_CREATE = [
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', content)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_messages_search_vector ON messages USING gin (search_vector)",
+]
+
+for statement in SQLITE_CREATE:
+    event.listen(Message.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in SQLITE_DROP:
+    event.listen(Message.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_CREATE:
+    event.listen(Message.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+# Search terms beyond this are ignored (keeps pathological queries cheap).
+MAX_TERMS = 8
+# Users in more chats than this are filtered by a join instead of inside the FTS query.
+MAX_SCOPE_CHATS = 500
+# Postgres: matches are first looked for among the newest PROBE_SPAN message
+# ids, and the id range grows PROBE_GROWTH times until it holds `window` matches.
+PROBE_SPAN = 100_000
+PROBE_GROWTH = 8
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def search_terms(q):
+    """Words of free user input, lowercased; FTS syntax is never interpreted."""
+    return [term.casefold() for term in re.findall(r'\w+', q)][:MAX_TERMS]
+
+
+def _fold(text):
+    """Casefolded text without diacritics ('Café' -> 'cafe'), as the FTS5 tokenizer sees it."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def _score(terms, content):
+    """
+    Term frequency normalized by log length, like ts_rank(..., 1) on Postgres.
+    No inverse document frequency: FTS5's bm25() computes it by counting every
+    document containing each term, which costs more than the whole search
+    for common words on a large corpus. Both sides are folded, so a term
+    matched by the index without its accents also counts here.
+    """
+    words = re.findall(r'\w+', _fold(content))
+    counts = Counter(words)
+    return sum(counts[_fold(term)] for term in terms) / (1 + math.log(max(len(words), 1)))
+
+
+def _sqlite_candidates(user_id, terms, window, chat_id):
+    """Ids and content of the newest `window` matches in the user's chats."""
+    members = user_chat_association.c
+    if chat_id is not None:
+        chat_ids = [chat_id]
+    else:
+        chat_ids = db.session.execute(
+            db.select(members.chat_id).where(members.user_id == user_id).limit(MAX_SCOPE_CHATS + 1)
+        ).scalars().all()
+        if not chat_ids:
+            return []
+
+    match = '{content}: (%s)' % ' '.join(f'"{term}"' for term in terms)
+    if len(chat_ids) <= MAX_SCOPE_CHATS:
+        match += ' AND {chat_id}: (%s)' % ' OR '.join(f'"{cid}"' for cid in chat_ids)
+
+    rowid = db.literal_column('messages_fts.rowid')
+    query = (
+        db.select(Message.id, Message.content)
+        .select_from(db.table('messages_fts'))
+        .join(Message, Message.id == rowid)
+        .join(user_chat_association, db.and_(
+            members.chat_id == Message.chat_id,
+            members.user_id == user_id
+        ))
+        .where(db.literal_column('messages_fts').op('MATCH')(match))
+        .order_by(rowid.desc())
+        .limit(window)
+    )
+    if chat_id is not None:
+        query = query.where(Message.chat_id == chat_id)
+    return db.session.execute(query).all()
+
+
+def _newest_matches(matches, window, newest_id):
+    """
+    The newest `window` rows of `matches` (a select whose first column is
+    Message.id), without sorting every match: each probe only looks at ids in
+    (newest_id - span, newest_id], and the span grows until the probe holds
+    `window` rows or covers every id.
+    """
+    span = PROBE_SPAN
+    while True:
+        low = newest_id - span
+        probe = matches if low <= 0 else matches.where(Message.id > low)
+        rows = db.session.execute(probe.order_by(Message.id.desc()).limit(window)).all()
+        if len(rows) >= window or low <= 0:
+            return rows
+        span *= PROBE_GROWTH
+
+
+def _rank_page(scored, offset, limit):
+    """
+    Sorts (score, message id) pairs best first (newer first on ties) and
+    returns [offset, offset + limit] of them as (Message, score) rows.
+    """
+    ranked = sorted(scored, reverse=True)[offset:offset + limit]
+    messages = {m.id: m for m in Message.query.filter(Message.id.in_([mid for _, mid in ranked]))}
+    return [(messages[mid], round(score, 4)) for score, mid in ranked]
+
+
+def search_messages(user_id, q, limit, offset, window, chat_id=None):
+    """
+    Ranked full-text search over the chats user_id participates in.
+
+    Every word must match. The newest `window` matches are ranked by
+    relevance (best first, newer first on ties), and [offset, offset + limit]
+    of that ranking is returned as (Message, score) rows. Bounding the ranked
+    set keeps the cost predictable on huge corpora: common words never rank
+    millions of rows. Returns None if q contains no searchable words.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    if _dialect() == 'sqlite':
+        candidates = _sqlite_candidates(user_id, terms, window, chat_id)
+        return _rank_page(
+            ((_score(terms, content), message_id) for message_id, content in candidates), offset, limit
+        )
+
+    members = user_chat_association.c
+    query = db.func.plainto_tsquery(TS_CONFIG, ' '.join(terms))
+    search_vector = db.literal_column('messages.search_vector')
+    matches = (
+        db.select(Message.id, db.func.ts_rank(search_vector, query, 1).label('score'))
+        .join(user_chat_association, db.and_(
+            members.chat_id == Message.chat_id,
+            members.user_id == user_id
+        ))
+        .where(search_vector.op('@@')(query))
+    )
+    newest = db.select(db.func.max(Message.id))
+    if chat_id is not None:
+        matches = matches.where(Message.chat_id == chat_id)
+        newest = newest.where(Message.chat_id == chat_id)
+    newest_id = db.session.execute(newest).scalar() or 0
+
+    # A GIN index returns matches unordered: bound the id range before sorting
+    # so common words do not sort every match in the corpus.
+    return _rank_page(
+        ((score, message_id) for message_id, score in _newest_matches(matches, window, newest_id)), offset, limit
+    )
@@ -0,0 +1,215 @@
+"""
+Streamed bulk data generation for capacity testing and benchmarks.
+
+Rows are produced by generators with explicit ids and written in fixed-size
+batches (COPY on Postgres, executemany elsewhere), so memory stays bounded no
+matter how many messages are generated. The same parameters and RNG seed
+always produce the same dataset.
+"""
+import csv
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import User, Chat, Message, user_chat_association
+
+DEFAULT_PASSWORD = 'password'
+
+# Fixed anchor so generated timestamps do not depend on when seeding runs.
+DEFAULT_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def user_email(user_id):
+    return f'user{user_id}@load.test'
+
+
+def validate_sizes(users, chats_per_user):
+    """
+    Raises ValueError for sizes chat_pairs cannot satisfy. A user can have at
+    most users - 1 distinct partners; past that, pairs would repeat and violate
+    the unique direct pair index halfway through seeding.
+    """
+    if users < 2:
+        raise ValueError('users must be at least 2')
+    if not 0 <= chats_per_user < users:
+        raise ValueError(f'chats_per_user must be between 0 and users - 1 ({users - 1}), got {chats_per_user}')
+
+
+def chat_pairs(users, chats_per_user):
+    """
+    Pairs user i with users i+1 .. i+k/2 around a ring, so every user ends up
+    in ~chats_per_user chats and no pair repeats (k < users, see validate_sizes).
+    """
+    validate_sizes(users, chats_per_user)
+    for offset in range(1, chats_per_user // 2 + 1):
+        for low in range(1, users + 1):
+            high = (low - 1 + offset) % users + 1
+            if low != high:
+                yield min(low, high), max(low, high)
+
+
+class BulkWriter:
+    """Writes row dicts to a table in batches, using COPY when the database supports it."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.use_copy = db.engine.dialect.name == 'postgresql'
+
+    def write(self, table, rows):
+        written = 0
+        rows = iter(rows)
+
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return written
+            if self.use_copy:
+                self._copy(table.name, batch)
+            else:
+                db.session.execute(table.insert(), batch)
+            written += len(batch)
+
+    @staticmethod
+    def copy_payload(table_name, batch):
+        """
+        COPY statement and CSV body for a batch. Only the keys of the rows are
+        listed, so omitted columns get their server defaults (as with
+        executemany) instead of NULL. Every row must have the same keys.
+        """
+        columns = list(batch[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow(['' if row[c] is None else row[c] for c in columns])
+        buffer.seek(0)
+        return f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+
+    def _copy(self, table_name, batch):
+        statement, buffer = self.copy_payload(table_name, batch)
+        cursor = db.session.connection().connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+
+def _reset_sequences():
+    """Explicit ids bypass Postgres sequences; move them past the seeded rows."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('users', 'chats', 'messages'):
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+
+
+def refresh_chat_activity():
+    """
+    Recomputes the denormalized chat state (last message, activity, message
+    count, read cursors) for data inserted without going through the message
+    routes. Every member is treated as having read their chats up to the newest message.
+    """
+    last_message = (
+        db.select(db.func.max(Message.id))
+        .where(Message.chat_id == Chat.id)
+        .scalar_subquery()
+    )
+    message_count = (
+        db.select(db.func.count())
+        .select_from(Message)
+        .where(Message.chat_id == Chat.id)
+        .scalar_subquery()
+    )
+    db.session.execute(db.update(Chat).values(last_message_id=last_message, message_count=message_count))
+
+    last_timestamp = db.select(Message.timestamp).where(Message.id == Chat.last_message_id).scalar_subquery()
+    db.session.execute(
+        db.update(Chat)
+        .where(Chat.last_message_id.is_not(None))
+        .values(last_activity=last_timestamp)
+    )
+
+    members = user_chat_association.c
+
+    def chat_column(column):
+        return db.select(column).where(Chat.id == members.chat_id).scalar_subquery()
+
+    db.session.execute(
+        db.update(user_chat_association).values(
+            last_read_message_id=chat_column(Chat.last_message_id),
+            read_count=chat_column(Chat.message_count),
+            is_group=chat_column(Chat.is_group),
+            last_activity=chat_column(Chat.last_activity)
+        )
+    )
+
+
+def bulk_seed(users, chats_per_user=10, messages_per_chat=50, days=30,
+              rng_seed=42, batch_size=10_000, end=DEFAULT_END, progress=None):
+    """
+    Inserts users, 1-on-1 chats and messages into an empty schema.
+    `progress(table, count)` is called after each table is written.
+    Returns the number of rows written per table.
+    """
+    validate_sizes(users, chats_per_user)
+    rng = random.Random(rng_seed)
+    writer = BulkWriter(batch_size)
+    start = end - timedelta(days=days)
+    span_seconds = max(int((end - start).total_seconds()), 1)
+    counts = {}
+
+    def report(table, count):
+        counts[table] = count
+        if progress:
+            progress(table, count)
+
+    # Hash once: every generated user shares the same password.
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+    report('users', writer.write(User.__table__, (
+        {'id': i, 'username': f'user{i}', 'email': user_email(i), 'password_hash': password_hash}
+        for i in range(1, users + 1)
+    )))
+
+    def chats():
+        for chat_id, (low, high) in enumerate(chat_pairs(users, chats_per_user), start=1):
+            yield chat_id, low, high
+
+    report('chats', writer.write(Chat.__table__, (
+        {'id': chat_id, 'created_at': start, 'direct_low_id': low, 'direct_high_id': high,
+         'last_message_id': None, 'last_activity': start, 'is_group': False, 'member_count': 2,
+         'message_count': 0, 'history_version': 0}
+        for chat_id, low, high in chats()
+    )))
+
+    report('participants', writer.write(user_chat_association, (
+        {'user_id': user_id, 'chat_id': chat_id, 'last_read_message_id': None, 'read_count': 0,
+         'is_group': False, 'last_activity': start, 'version': 0}
+        for chat_id, low, high in chats()
+        for user_id in (low, high)
+    )))
+
+    def messages():
+        message_id = 0
+        for chat_id, low, high in chats():
+            # Sorted random offsets keep timestamps increasing within each chat
+            offsets = sorted(rng.randrange(span_seconds) for _ in range(messages_per_chat))
+            for offset in offsets:
+                message_id += 1
+                yield {
+                    'id': message_id,
+                    'content': f'Message {message_id} ' + 'lorem ipsum ' * rng.randint(1, 12),
+                    'timestamp': start + timedelta(seconds=offset),
+                    'user_id': low if rng.random() < 0.5 else high,
+                    'chat_id': chat_id,
+                }
+
+    report('messages', writer.write(Message.__table__, messages()))
+
+    refresh_chat_activity()
+    _reset_sequences()
+    db.session.commit()
+    return counts
@@ -1,5 +1,13 @@
+from contextlib import contextmanager
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
 import pytest
 from flask import Flask
+from sqlalchemy import event
 # We anticipate importing 'db' from app, even though it doesn't exist yet (TDD RED state).
 # This import will cause the test to fail, which is the intended first step.
 from app import create_app, db
@@ -33,4 +41,84 @@ def app() -> Flask:
 @pytest.fixture
 def client(app: Flask):
     """A test client for making HTTP requests to the app."""
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
+
+
+@pytest.fixture
+def capture_queries(app: Flask):
+    """
+    Records the SQL statements executed inside a `with` block:
+
+        with capture_queries() as statements:
+            client.get('/api/chats', headers=headers)
+    """
+    @contextmanager
+    def capture():
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    return capture
+
+
+@pytest.fixture
+def login(client):
+    """
+    Registers a user (<username>@test.com, password 'pw') and returns the
+    Authorization headers of their login: `alice = login('alice')`.
+    """
+    def register_and_login(username):
+        client.post('/api/auth/register', json={
+            'username': username, 'email': f'{username}@test.com', 'password': 'pw'
+        })
+        res = client.post('/api/auth/login', json={'email': f'{username}@test.com', 'password': 'pw'})
+        return {'Authorization': f"Bearer {res.json['access_token']}"}
+
+    return register_and_login
+
+
+@pytest.fixture
+def serve(tmp_path):
+    """
+    Starts Gunicorn with the shipped gunicorn.conf.py on a fresh, migrated
+    SQLite file and returns its base URL: `base = serve(GUNICORN_THREADS='2')`.
+    Keyword arguments override the environment; the server stops after the test.
+    """
+    backend = os.path.join(os.path.dirname(__file__), '..')
+    servers = []
+
+    def start(**overrides):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        env = dict(os.environ, FLASK_APP='app.py', DATABASE_URL=f"sqlite:///{tmp_path / 'served.db'}",
+                   GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY='1')
+        for name in ('GUNICORN_WORKER_CLASS', 'SOCKETIO_ASYNC_MODE', 'SOCKETIO_MESSAGE_QUEUE', 'PROMETHEUS_MULTIPROC_DIR'):
+            env.pop(name, None)
+        env.update(overrides)
+        subprocess.run([sys.executable, '-m', 'flask', 'db', 'upgrade'], cwd=backend, env=env,
+                       check=True, capture_output=True)
+        servers.append(subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=backend, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        base = f'http://127.0.0.1:{port}'
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + '/hello', timeout=1).close()
+                return base
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('Gunicorn did not start')
+
+    yield start
+    for server in servers:
+        server.terminate()
+        server.wait(timeout=10)
@@ -0,0 +1,40 @@
+from benchmarks import run as bench
+
+
+def test_benchmark_suite_smoke(tmp_path):
+    """
+    GIVEN a freshly seeded tiny dataset
+    WHEN every benchmark scenario runs a couple of requests
+    THEN results should be reported without errors and compare cleanly to themselves.
+    """
+    results = bench.run(
+        f"sqlite:///{tmp_path / 'bench.db'}",
+        scale='tiny',
+        requests=2,
+        warmup=0,
+        scenarios=list(bench.SCENARIOS),
+        seed=True,
+    )
+
+    assert results['meta']['seeded'] == {'users': 50, 'chats': 100, 'participants': 200, 'messages': 2000}
+    assert set(results['scenarios']) == set(bench.SCENARIOS)
+    for name, scenario in results['scenarios'].items():
+        assert scenario['errors'] == 0, name
+        assert scenario['queries_per_request']['max'] >= 1, name
+
+    assert bench.compare(results, results, threshold=0.2) == []
+
+
+def test_payload_benchmark_smoke():
+    """
+    GIVEN a small synthetic history page
+    WHEN the payload benchmark runs a few iterations
+    THEN every provider should produce the same body and every encoding should shrink it.
+    """
+    from benchmarks import payloads
+
+    results = payloads.run(messages=20, content_words=10, repeat=3)
+
+    assert len({row['bytes'] for row in results['providers'].values()}) == 1
+    identity = results['encodings']['identity']['bytes']
+    assert all(row['bytes'] < identity for name, row in results['encodings'].items() if name != 'identity')
@@ -1,6 +1,6 @@
 import json
 from app import db
-from models import User
+from models import User, Chat
 
 
 def get_auth_header(client, email, password):
@@ -105,4 +105,68 @@ def test_get_user_chats(client, app):
     assert isinstance(data, list)
     assert len(data) == 1
     # Critical: check if we get the partner's name for the UI
-    assert data[0]['partner_username'] == 'partner'
\ No newline at end of file
+    assert data[0]['partner_username'] == 'partner'
+
+
+def test_get_chats_query_count_is_constant(client, app, capture_queries):
+    """
+    GIVEN a user whose number of chats grows from 1 to 10
+    WHEN GET /api/chats is called
+    THEN the number of SQL queries should stay the same (no N+1).
+    """
+    client.post('/api/auth/register', json={'username': 'hub', 'email': 'hub@test.com', 'password': 'pw'})
+    auth_headers = get_auth_header(client, 'hub@test.com', 'pw')
+
+    def add_chats(count, offset):
+        with app.app_context():
+            hub = User.query.filter_by(email='hub@test.com').first()
+            for i in range(offset, offset + count):
+                partner = User(username=f'p{i}', email=f'p{i}@test.com', password_hash='x')
+                chat = Chat()
+                chat.participants.extend([hub, partner])
+                db.session.add(chat)
+            db.session.commit()
+
+    # Warm the per-process token version cache so only the chat list is measured
+    client.get('/api/profile', headers=auth_headers)
+
+    add_chats(1, 0)
+    with capture_queries() as queries_one_chat:
+        client.get('/api/chats', headers=auth_headers)
+
+    add_chats(9, 1)
+    with capture_queries() as queries_many_chats:
+        response = client.get('/api/chats', headers=auth_headers)
+
+    assert len(response.json) == 10
+    assert {c['partner_username'] for c in response.json} == {f'p{i}' for i in range(10)}
+    assert len(queries_many_chats) == len(queries_one_chat)
+
+
+def test_create_chat_returns_existing_pair(client, app):
+    """
+    GIVEN a chat between two users
+    WHEN either user creates a chat with the other again
+    THEN the existing chat should be returned instead of a duplicate.
+    """
+    client.post('/api/auth/register', json={'username': 'left', 'email': 'left@test.com', 'password': 'pw'})
+    client.post('/api/auth/register', json={'username': 'right', 'email': 'right@test.com', 'password': 'pw'})
+    left_headers = get_auth_header(client, 'left@test.com', 'pw')
+    right_headers = get_auth_header(client, 'right@test.com', 'pw')
+
+    with app.app_context():
+        left_id = User.query.filter_by(email='left@test.com').first().id
+        right_id = User.query.filter_by(email='right@test.com').first().id
+
+    created = client.post('/api/chats', json={'recipient_id': right_id}, headers=left_headers)
+    assert created.status_code == 201
+
+    # Pair key is canonical, so the reverse direction hits the same chat
+    again = client.post('/api/chats', json={'recipient_id': left_id}, headers=right_headers)
+    assert again.status_code == 200
+    assert again.json['chat_id'] == created.json['chat_id']
+
+    with app.app_context():
+        assert Chat.query.count() == 1
+        chat = db.session.get(Chat, created.json['chat_id'])
+        assert (chat.direct_low_id, chat.direct_high_id) == Chat.direct_pair(left_id, right_id)
@@ -0,0 +1,181 @@
+def setup_users(login, *names):
+    headers = [login(name) for name in names]
+    return headers, list(range(1, len(names) + 1))
+
+
+def test_unread_counts_and_preview(client, login):
+    """
+    GIVEN a chat between Alice and Bob
+    WHEN Alice sends two messages
+    THEN Bob's chat list should show two unread and the newest message as preview,
+    while Alice has nothing unread.
+    """
+    (alice, bob), (alice_id, bob_id) = setup_users(login, 'alice', 'bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'first'}, headers=alice)
+    last = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'second'}, headers=alice).json
+
+    bob_chat = client.get('/api/chats', headers=bob).json[0]
+    assert bob_chat['unread_count'] == 2
+    assert bob_chat['last_message']['id'] == last['id']
+    assert bob_chat['last_message']['content'] == 'second'
+    assert bob_chat['last_message']['author_id'] == alice_id
+    assert bob_chat['last_activity'] == last['timestamp']
+
+    assert client.get('/api/chats', headers=alice).json[0]['unread_count'] == 0
+
+
+def test_mark_read_moves_cursor_forward(client, login):
+    """
+    GIVEN three unread messages for Bob
+    WHEN Bob marks the first one as read, then the whole chat
+    THEN the unread count should drop to 2 and then to 0, and never move backwards.
+    """
+    (alice, bob), (_, bob_id) = setup_users(login, 'alice', 'bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+    ids = [
+        client.post(f'/api/chats/{chat_id}/messages', json={'content': f'm{i}'}, headers=alice).json['id']
+        for i in range(3)
+    ]
+
+    res = client.post(f'/api/chats/{chat_id}/read', json={'message_id': ids[0]}, headers=bob)
+    assert res.status_code == 200
+    assert res.json == {'chat_id': chat_id, 'last_read_message_id': ids[0], 'unread_count': 2}
+
+    res = client.post(f'/api/chats/{chat_id}/read', headers=bob)
+    assert res.json['last_read_message_id'] == ids[2]
+    assert res.json['unread_count'] == 0
+
+    res = client.post(f'/api/chats/{chat_id}/read', json={'message_id': ids[0]}, headers=bob)
+    assert res.json['last_read_message_id'] == ids[2]
+
+
+def test_delete_updates_unread_and_preview(client, login):
+    """
+    GIVEN two unread messages for Bob
+    WHEN Alice deletes the newest one
+    THEN Bob should have one unread and the preview should fall back to the previous message.
+    """
+    (alice, bob), (_, bob_id) = setup_users(login, 'alice', 'bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+    first = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'keep'}, headers=alice).json
+    second = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'oops'}, headers=alice).json
+
+    client.delete(f"/api/messages/{second['id']}", headers=alice)
+
+    bob_chat = client.get('/api/chats', headers=bob).json[0]
+    assert bob_chat['unread_count'] == 1
+    assert bob_chat['last_message']['id'] == first['id']
+
+
+def test_chats_ordered_by_recent_activity(client, login):
+    """
+    GIVEN Alice with chats to Bob and Carol
+    WHEN a message arrives in the older chat
+    THEN that chat should move to the top of the list.
+    """
+    (alice, bob, carol), (_, bob_id, carol_id) = setup_users(login, 'alice', 'bob', 'carol')
+    bob_chat = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+    carol_chat = client.post('/api/chats', json={'recipient_id': carol_id}, headers=alice).json['chat_id']
+
+    assert [c['id'] for c in client.get('/api/chats', headers=alice).json] == [carol_chat, bob_chat]
+
+    client.post(f'/api/chats/{bob_chat}/messages', json={'content': 'ping'}, headers=bob)
+
+    assert [c['id'] for c in client.get('/api/chats', headers=alice).json] == [bob_chat, carol_chat]
+
+
+def test_mark_read_requires_membership(client, login):
+    """
+    GIVEN a chat between Alice and Bob
+    WHEN Carol tries to mark it as read
+    THEN access should be denied.
+    """
+    (alice, _, carol), (_, bob_id, _) = setup_users(login, 'alice', 'bob', 'carol')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+
+    assert client.post(f'/api/chats/{chat_id}/read', headers=carol).status_code == 403
+
+
+def test_chat_list_pages_follow_cursor(client, login):
+    """
+    GIVEN Alice with five chats
+    WHEN the chat list is fetched two at a time following X-Next-Cursor
+    THEN every chat should appear exactly once, newest activity first.
+    """
+    names = ['alice'] + [f'friend{i}' for i in range(5)]
+    (alice, *_), (_, *friend_ids) = setup_users(login, *names)
+    chat_ids = [
+        client.post('/api/chats', json={'recipient_id': friend_id}, headers=alice).json['chat_id']
+        for friend_id in friend_ids
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        res = client.get('/api/chats', query_string=params, headers=alice)
+        assert len(res.json) <= 2
+        seen += [c['id'] for c in res.json]
+        if res.headers['X-Has-More'] == 'false':
+            break
+        cursor = res.headers['X-Next-Cursor']
+
+    assert seen == chat_ids[::-1]
+
+
+def test_chat_list_rejects_malformed_cursor(client, login):
+    """
+    GIVEN a logged-in user
+    WHEN the chat list is requested with a garbage cursor
+    THEN a 400 should be returned.
+    """
+    (alice,), _ = setup_users(login, 'alice')
+
+    assert client.get('/api/chats?cursor=nope', headers=alice).status_code == 400
+
+
+def test_chat_list_pages_interleave_groups_and_direct_chats(client, login):
+    """
+    GIVEN Alice with two direct chats and two groups, messaged in alternating order
+    WHEN the chat list is fetched one chat at a time following X-Next-Cursor
+    THEN every chat should appear exactly once, newest activity first, whatever its kind.
+    """
+    (alice, *_), (_, bob_id, carol_id) = setup_users(login, 'alice', 'bob', 'carol')
+    order = [
+        client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id'],
+        client.post('/api/chats/groups', json={'name': 'G1', 'member_ids': [bob_id]}, headers=alice).json['chat_id'],
+        client.post('/api/chats', json={'recipient_id': carol_id}, headers=alice).json['chat_id'],
+        client.post('/api/chats/groups', json={'name': 'G2', 'member_ids': [carol_id]}, headers=alice).json['chat_id'],
+    ]
+    for chat_id in order:
+        client.post(f'/api/chats/{chat_id}/messages', json={'content': 'hi'}, headers=alice)
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 1, **({'cursor': cursor} if cursor else {})}
+        res = client.get('/api/chats', query_string=params, headers=alice)
+        seen += [c['id'] for c in res.json]
+        if res.headers['X-Has-More'] == 'false':
+            break
+        cursor = res.headers['X-Next-Cursor']
+
+    assert seen == order[::-1]
+
+
+def test_deleting_a_read_message_keeps_unread_counts(client, login):
+    """
+    GIVEN two messages from Alice, the first read by Bob
+    WHEN Alice deletes the read one
+    THEN Bob should still have exactly the unread second message.
+    """
+    (alice, bob), (_, bob_id) = setup_users(login, 'alice', 'bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+    first = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'read'}, headers=alice).json['id']
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'unread'}, headers=alice)
+    client.post(f'/api/chats/{chat_id}/read', json={'message_id': first}, headers=bob)
+
+    client.delete(f'/api/messages/{first}', headers=alice)
+
+    assert client.get('/api/chats', headers=bob).json[0]['unread_count'] == 1
+    assert client.post(f'/api/chats/{chat_id}/read', headers=bob).json['unread_count'] == 0
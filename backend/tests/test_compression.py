@@ -0,0 +1,92 @@
+import gzip
+import brotli
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from json_provider import OrjsonProvider
+
+
+def chat_with_history(client, login, messages):
+    alice = login('alice')
+    login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    for i in range(messages):
+        client.post(f'/api/chats/{chat_id}/messages', json={'content': f'message {i} ' + 'lorem ipsum ' * 10}, headers=alice)
+    return alice, chat_id
+
+
+@pytest.mark.parametrize('encoding, decompress', [('gzip', gzip.decompress), ('br', brotli.decompress)])
+def test_large_history_page_is_compressed(client, login, encoding, decompress):
+    """
+    GIVEN a history page well above COMPRESSION_MIN_SIZE
+    WHEN it is requested with Accept-Encoding naming one algorithm
+    THEN the body should be smaller, encoded with it, and decode to the identity JSON.
+    """
+    alice, chat_id = chat_with_history(client, login, 20)
+    url = f'/api/chats/{chat_id}/messages'
+    plain = client.get(url, headers=alice)
+    assert 'Content-Encoding' not in plain.headers
+
+    res = client.get(url, headers={**alice, 'Accept-Encoding': f'{encoding}, identity;q=0.5'})
+
+    assert res.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in res.headers['Vary']
+    assert len(res.data) < len(plain.data) / 3
+    assert decompress(res.data) == plain.data
+
+
+def test_client_preference_and_small_bodies(client, login):
+    """
+    GIVEN a large history page and a small profile response
+    WHEN a client prefers gzip over br, and then fetches the profile
+    THEN gzip should be chosen, and the small body should not be compressed.
+    """
+    alice, chat_id = chat_with_history(client, login, 20)
+    accept = {'Accept-Encoding': 'br;q=0.5, gzip'}
+
+    res = client.get(f'/api/chats/{chat_id}/messages', headers={**alice, **accept})
+    assert res.headers['Content-Encoding'] == 'gzip'
+
+    res = client.get('/api/profile', headers={**alice, **accept})
+    assert 'Content-Encoding' not in res.headers
+    assert res.json['username'] == 'alice'
+
+
+def test_compressed_etag_still_revalidates(client, login):
+    """
+    GIVEN an older history page fetched compressed (its ETag made weak)
+    WHEN it is revalidated with that ETag
+    THEN the response should be an empty, uncompressed 304.
+    """
+    alice, chat_id = chat_with_history(client, login, 25)
+    url = f'/api/chats/{chat_id}/messages?before_id=25'
+    headers = {**alice, 'Accept-Encoding': 'gzip'}
+    res = client.get(url, headers=headers)
+    assert res.headers['Content-Encoding'] == 'gzip'
+    etag = res.headers['ETag']
+    assert etag.startswith('W/')
+
+    res = client.get(url, headers={**headers, 'If-None-Match': etag})
+
+    assert res.status_code == 304
+    assert res.data == b''
+    assert 'Content-Encoding' not in res.headers
+
+
+def test_json_provider_is_configurable():
+    """
+    GIVEN the JSON_PROVIDER setting
+    WHEN the app is created with 'auto', 'default', or an unknown name
+    THEN orjson should be used when installed, the stdlib when asked, and unknown names rejected.
+    """
+    def provider(name):
+        return create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JSON_PROVIDER': name}).json
+
+    assert isinstance(provider('auto'), OrjsonProvider)
+    assert type(provider('default')) is DefaultJSONProvider
+    with pytest.raises(ValueError):
+        provider('simdjson')
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.test_request_context():
+        assert app.json.loads(app.json.response({'a': [1, 2], 3: 'x'}).get_data()) == {'a': [1, 2], '3': 'x'}
@@ -0,0 +1,155 @@
+
+def revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, 'If-None-Match': etag})
+
+
+def test_chat_list_not_modified_until_something_changes(client, login, capture_queries):
+    """
+    GIVEN Alice's fetched chat list with Bob
+    WHEN she revalidates it, then Bob sends a message, then Bob renames himself
+    THEN the first revalidation should be a 304 running one query, and each change a fresh 200.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    first = client.get('/api/chats', headers=alice)
+    etag = first.headers['ETag']
+    assert 'Authorization' in first.headers['Vary']
+
+    with capture_queries() as statements:
+        res = revalidate(client, '/api/chats', alice, etag)
+    assert res.status_code == 304
+    assert res.data == b''
+    assert len(statements) == 1
+
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'hi'}, headers=bob)
+    res = revalidate(client, '/api/chats', alice, etag)
+    assert res.status_code == 200
+    etag = res.headers['ETag']
+
+    client.put('/api/profile', json={'username': 'robert'}, headers=bob)
+    res = revalidate(client, '/api/chats', alice, etag)
+    assert res.status_code == 200
+    assert res.json[0]['partner_username'] == 'robert'
+
+
+def test_history_page_is_cacheable_until_edit(client, app, login):
+    """
+    GIVEN a chat with three messages and an older page fetched with before_id
+    WHEN it is revalidated, a new message arrives, and then an old message is edited
+    THEN it should stay 304 (with a long max-age) until the edit.
+    """
+    alice = login('alice')
+    login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    ids = [
+        client.post(f'/api/chats/{chat_id}/messages', json={'content': f'm{i}'}, headers=alice).json['id']
+        for i in range(3)
+    ]
+    url = f'/api/chats/{chat_id}/messages?before_id={ids[2]}'
+
+    page = client.get(url, headers=alice)
+    etag = page.headers['ETag']
+    assert page.headers['Cache-Control'] == f"private, max-age={app.config['HISTORY_MAX_AGE']}"
+
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'newer'}, headers=alice)
+    assert revalidate(client, url, alice, etag).status_code == 304
+
+    client.put(f'/api/messages/{ids[0]}', json={'content': 'edited'}, headers=alice)
+    res = revalidate(client, url, alice, etag)
+    assert res.status_code == 200
+    assert res.json[0]['content'] == 'edited'
+
+
+def test_profile_etag(client, login):
+    """
+    GIVEN a fetched profile
+    WHEN it is revalidated before and after a rename
+    THEN the first should be 304 and the second a fresh 200.
+    """
+    alice = login('alice')
+    etag = client.get('/api/profile', headers=alice).headers['ETag']
+
+    assert revalidate(client, '/api/profile', alice, etag).status_code == 304
+
+    client.put('/api/profile', json={'username': 'alicia'}, headers=alice)
+    res = revalidate(client, '/api/profile', alice, etag)
+    assert res.status_code == 200
+    assert res.json['username'] == 'alicia'
+
+
+def test_chat_list_changes_when_leaving_one_group_and_joining_another(client, login):
+    """
+    GIVEN Bob's fetched chat list containing only group G
+    WHEN he leaves G and is then added to a new group H
+    THEN revalidating with the old ETag should return the new list, not a 304.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    g_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [2]}, headers=alice).json['chat_id']
+    first = client.get('/api/chats', headers=bob)
+    assert [chat['name'] for chat in first.json] == ['G']
+
+    client.delete(f'/api/chats/{g_id}/members/2', headers=bob)
+    client.post('/api/chats/groups', json={'name': 'H', 'member_ids': [2]}, headers=alice)
+    res = revalidate(client, '/api/chats', bob, first.headers['ETag'])
+
+    assert res.status_code == 200
+    assert [chat['name'] for chat in res.json] == ['H']
+
+
+def test_history_pages_change_when_their_author_deletes_their_account(client, login):
+    """
+    GIVEN older history pages with Bob's messages, in a direct chat and in a group he has left
+    WHEN Bob deletes his account
+    THEN revalidating either page should return it with the author removed, not a 304.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    direct_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    group_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [2]}, headers=alice).json['chat_id']
+    pages = {}
+    for chat_id in (direct_id, group_id):
+        first = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'old'}, headers=bob).json['id']
+        last = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'new'}, headers=alice).json['id']
+        url = f'/api/chats/{chat_id}/messages?before_id={last}'
+        page = client.get(url, headers=alice)
+        assert page.json[0]['author_id'] == 2
+        pages[url] = page.headers['ETag']
+    client.delete(f'/api/chats/{group_id}/members/2', headers=bob)
+
+    client.delete('/api/profile', headers=bob)
+
+    for url, etag in pages.items():
+        res = revalidate(client, url, alice, etag)
+        assert res.status_code == 200
+        assert res.json[0]['author_id'] is None
+
+
+def test_chat_list_etag_covers_only_the_requested_page(client, login, capture_queries):
+    """
+    GIVEN Alice's first chat list page of one chat, out of two
+    WHEN it is revalidated, the older chat is marked read, and then the newer one gets a message
+    THEN it should stay 304 (with one query and no aggregate) until the newer chat changes.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    login('carol')
+    older = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    newer = client.post('/api/chats', json={'recipient_id': 3}, headers=alice).json['chat_id']
+    client.post(f'/api/chats/{older}/messages', json={'content': 'hi alice'}, headers=bob)
+    client.post(f'/api/chats/{newer}/messages', json={'content': 'hi carol'}, headers=alice)
+    first = client.get('/api/chats?limit=1', headers=alice)
+    assert [chat['id'] for chat in first.json] == [newer]
+    etag = first.headers['ETag']
+
+    with capture_queries() as statements:
+        assert revalidate(client, '/api/chats?limit=1', alice, etag).status_code == 304
+    assert len(statements) == 1
+    assert 'sum(' not in statements[0].lower()
+
+    client.post(f'/api/chats/{older}/read', headers=alice)
+    assert revalidate(client, '/api/chats?limit=1', alice, etag).status_code == 304
+
+    client.post(f'/api/chats/{newer}/messages', json={'content': 'again'}, headers=alice)
+    assert revalidate(client, '/api/chats?limit=1', alice, etag).status_code == 200
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app import create_app
+from db_pool import InstrumentedQueuePool, build_engine_options, pool_stats
+
+
+def test_postgres_engine_options_from_config():
+    """
+    GIVEN a Postgres database URL and DB_POOL_* settings
+    WHEN the app is created
+    THEN the engine options should carry pool sizing, recycle and pre-ping.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "postgresql+psycopg2://user:pw@localhost/db",
+        "DB_POOL_SIZE": 3,
+        "DB_MAX_OVERFLOW": 7,
+    })
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 7
+    assert options["pool_recycle"] == 1800
+    assert options["pool_pre_ping"] is True
+
+
+def test_sqlite_engine_options_skip_pool_sizing(app):
+    """
+    GIVEN the in-memory SQLite test database
+    WHEN engine options are built
+    THEN only pre-ping should be set (SQLite pools reject sizing arguments).
+    """
+    assert build_engine_options(app.config) == {"pool_pre_ping": True}
+
+
+def test_instrumented_pool_records_waits_and_timeouts(tmp_path):
+    """
+    GIVEN a pool with a single connection and no overflow
+    WHEN a second checkout is attempted while the first is held
+    THEN the timeout and the checkout time should be recorded.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert pool_stats(engine)["checked_out"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["timeouts_total"] == 1
+    assert stats["checkouts_total"] == 2
+    assert stats["checkout_seconds_max"] >= 0.05
+
+
+def test_metrics_endpoint_exposes_pool_and_cache(client):
+    """
+    GIVEN a running app
+    WHEN /metrics is scraped
+    THEN it should return Prometheus text including membership cache counters.
+    """
+    res = client.get('/metrics')
+
+    assert res.status_code == 200
+    assert res.mimetype == 'text/plain'
+    assert b'membership_cache_hits_total' in res.data
@@ -0,0 +1,194 @@
+import time
+from app import db
+from cache import get_membership_cache
+from models import Chat, User, user_chat_association
+
+
+def setup_users(login, *names):
+    headers = [login(name) for name in names]
+    return headers, list(range(1, len(names) + 1))
+
+
+def add_users(count):
+    """Inserts plain users directly (no login needed); returns their ids."""
+    users = [User(username=f'member{i}', email=f'member{i}@test.com', password_hash='x') for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def test_group_in_chat_list(client, login):
+    """
+    GIVEN Alice, Bob and Carol
+    WHEN Alice creates a group with Bob and Carol
+    THEN everyone's chat list should show the group name and three members, without a partner.
+    """
+    (alice, bob, _), (_, bob_id, carol_id) = setup_users(login, 'alice', 'bob', 'carol')
+
+    res = client.post('/api/chats/groups', json={'name': 'Trip', 'member_ids': [bob_id, carol_id, 999]},
+                      headers=alice)
+    assert res.status_code == 201
+    assert res.json['member_count'] == 3
+
+    chat = client.get('/api/chats', headers=bob).json[0]
+    assert chat['id'] == res.json['chat_id']
+    assert chat['is_group'] is True
+    assert chat['name'] == 'Trip'
+    assert chat['member_count'] == 3
+    assert chat['partner_id'] is None
+    assert chat['partner_username'] is None
+
+
+def test_group_message_fans_out_unread(client, login):
+    """
+    GIVEN a group of Alice, Bob and Carol with one message already sent
+    WHEN Dave is added and Alice sends another message
+    THEN Bob and Carol should have two unread, Dave only the new one, Alice none.
+    """
+    (alice, bob, carol, dave), (_, bob_id, carol_id, dave_id) = setup_users(login, 'alice', 'bob', 'carol', 'dave')
+    chat_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [bob_id, carol_id]},
+                          headers=alice).json['chat_id']
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'before'}, headers=alice)
+
+    res = client.post(f'/api/chats/{chat_id}/members', json={'member_ids': [dave_id, bob_id]}, headers=bob)
+    assert res.json['added'] == [dave_id]
+
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'after'}, headers=alice)
+
+    unread = {
+        name: client.get('/api/chats', headers=headers).json[0]['unread_count']
+        for name, headers in (('alice', alice), ('bob', bob), ('carol', carol), ('dave', dave))
+    }
+    assert unread == {'alice': 0, 'bob': 2, 'carol': 2, 'dave': 1}
+
+
+def test_send_cost_does_not_grow_with_members(client, login, capture_queries):
+    """
+    GIVEN two groups, one with 3 members and one with 300
+    WHEN Alice sends a message to each
+    THEN both sends should run the same number of SQL statements.
+    """
+    (alice,), _ = setup_users(login, 'alice')
+    member_ids = add_users(300)
+    small = client.post('/api/chats/groups', json={'name': 'S', 'member_ids': member_ids[:2]}, headers=alice)
+    large = client.post('/api/chats/groups', json={'name': 'L', 'member_ids': member_ids}, headers=alice)
+    assert large.json['member_count'] == 301
+
+    def count_send(chat_id):
+        client.post(f'/api/chats/{chat_id}/messages', json={'content': 'warm'}, headers=alice)
+        with capture_queries() as statements:
+            client.post(f'/api/chats/{chat_id}/messages', json={'content': 'hi'}, headers=alice)
+        return len(statements)
+
+    assert count_send(small.json['chat_id']) == count_send(large.json['chat_id'])
+
+
+def test_group_send_writes_only_the_authors_member_row(client, login):
+    """
+    GIVEN a group of Alice and 300 members
+    WHEN Alice sends a message
+    THEN only Alice's participant row should change, while everyone else still sees one unread.
+    """
+    (alice,), _ = setup_users(login, 'alice')
+    member_ids = add_users(300)
+    chat_id = client.post('/api/chats/groups', json={'name': 'L', 'member_ids': member_ids},
+                          headers=alice).json['chat_id']
+    members = user_chat_association.c
+
+    def member_rows():
+        return set(db.session.execute(db.select(user_chat_association).where(members.chat_id == chat_id)).all())
+
+    before = member_rows()
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'hi'}, headers=alice)
+    changed = member_rows() - before
+
+    assert [row.user_id for row in changed] == [1]
+    unread = db.session.execute(
+        db.select(Chat.message_count - members.read_count)
+        .select_from(user_chat_association)
+        .join(Chat, Chat.id == members.chat_id)
+        .where(members.chat_id == chat_id, members.user_id == member_ids[0])
+    ).scalar()
+    assert unread == 1
+
+
+def test_member_list_pages(client, login):
+    """
+    GIVEN a group with five members
+    WHEN the member list is fetched two at a time following X-Next-Cursor
+    THEN every member should appear once, ordered by id.
+    """
+    (alice,), (alice_id,) = setup_users(login, 'alice')
+    member_ids = add_users(4)
+    chat_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': member_ids},
+                          headers=alice).json['chat_id']
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'after_id': cursor} if cursor else {})}
+        res = client.get(f'/api/chats/{chat_id}/members', query_string=params, headers=alice)
+        seen += [member['id'] for member in res.json]
+        if res.headers['X-Has-More'] == 'false':
+            break
+        cursor = res.headers['X-Next-Cursor']
+
+    assert seen == [alice_id, *member_ids]
+
+
+def test_remove_member_rules(client, login):
+    """
+    GIVEN a group owned by Alice with Bob and Carol
+    WHEN Bob tries to remove Carol, Alice removes Bob, and then Alice leaves
+    THEN Bob should be refused, then lose access, and ownership should pass to Carol.
+    """
+    (alice, bob, carol), (alice_id, bob_id, carol_id) = setup_users(login, 'alice', 'bob', 'carol')
+    chat_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [bob_id, carol_id]},
+                          headers=alice).json['chat_id']
+
+    assert client.delete(f'/api/chats/{chat_id}/members/{carol_id}', headers=bob).status_code == 403
+
+    assert client.delete(f'/api/chats/{chat_id}/members/{bob_id}', headers=alice).status_code == 200
+    assert client.get(f'/api/chats/{chat_id}/messages', headers=bob).status_code == 403
+
+    assert client.delete(f'/api/chats/{chat_id}/members/{alice_id}', headers=alice).status_code == 200
+    assert client.get('/api/chats', headers=carol).json[0]['member_count'] == 1
+    # Carol now owns the group and may remove others
+    client.post(f'/api/chats/{chat_id}/members', json={'member_ids': [bob_id]}, headers=carol)
+    assert client.delete(f'/api/chats/{chat_id}/members/{bob_id}', headers=carol).status_code == 200
+
+
+def test_direct_chat_has_no_member_management(client, login):
+    """
+    GIVEN a 1-on-1 chat
+    WHEN someone tries to add a member to it
+    THEN a 400 should be returned.
+    """
+    (alice, _, _), (_, bob_id, carol_id) = setup_users(login, 'alice', 'bob', 'carol')
+    chat_id = client.post('/api/chats', json={'recipient_id': bob_id}, headers=alice).json['chat_id']
+
+    res = client.post(f'/api/chats/{chat_id}/members', json={'member_ids': [carol_id]}, headers=alice)
+    assert res.status_code == 400
+    assert client.get('/api/chats', headers=alice).json[0]['member_count'] == 2
+
+
+def test_member_removed_elsewhere_loses_access_after_group_ttl(client, app, login):
+    """
+    GIVEN Bob's cached membership of a group
+    WHEN another worker removes him (no local invalidation) and MEMBERSHIP_GROUP_CACHE_TTL passes
+    THEN he should no longer be able to post, while his direct chat entry stays cached.
+    """
+    app.config['MEMBERSHIP_GROUP_CACHE_TTL'] = 0.05
+    (alice, bob), (alice_id, bob_id) = setup_users(login, 'alice', 'bob')
+    group_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [bob_id]},
+                           headers=alice).json['chat_id']
+    direct_id = client.post('/api/chats', json={'recipient_id': alice_id}, headers=bob).json['chat_id']
+    assert client.post(f'/api/chats/{group_id}/messages', json={'content': 'hi'}, headers=bob).status_code == 201
+    client.get(f'/api/chats/{direct_id}/messages', headers=bob)
+
+    # What another worker's DELETE /members does, minus this process's cache invalidation
+    Chat.remove_members(group_id, [bob_id])
+    db.session.commit()
+    time.sleep(0.1)
+
+    assert client.post(f'/api/chats/{group_id}/messages', json={'content': 'hi'}, headers=bob).status_code == 403
+    assert get_membership_cache().get((bob_id, direct_id)) is True
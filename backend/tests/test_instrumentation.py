@@ -0,0 +1,60 @@
+import logging
+from app import create_app, db
+
+
+def test_server_timing_header_reports_queries(client, login):
+    """
+    GIVEN a logged-in user with warm caches
+    WHEN an endpoint that hits the database is called
+    THEN the response should carry a Server-Timing header with app and db durations.
+    """
+    headers = login('timer')
+    client.get('/api/chats', headers=headers)
+
+    res = client.get('/api/chats', headers=headers)
+
+    timing = res.headers['Server-Timing']
+    assert timing.startswith('app;dur=')
+    assert 'db;dur=' in timing
+    # The page query (the ETag is computed from its rows)
+    assert 'desc="1 queries"' in timing
+
+
+def test_request_log_has_structured_fields(client, caplog, login):
+    """
+    GIVEN a running app
+    WHEN a request that writes to the database completes
+    THEN the request log record should carry duration, query and row fields.
+    """
+    headers = login('logger')
+    caplog.set_level(logging.INFO)
+
+    client.put('/api/profile', json={'username': 'renamed'}, headers=headers)
+
+    record = next(r for r in caplog.records if r.getMessage().startswith('Request: PUT /api/profile'))
+    assert record.endpoint == 'users.update_profile'
+    assert record.status == 200
+    assert record.db_queries >= 2
+    assert record.db_rows >= 1
+    assert record.duration_ms >= record.db_ms
+
+
+def test_slow_query_log_is_opt_in(caplog):
+    """
+    GIVEN an app with SLOW_QUERY_MS set to 0.0001
+    WHEN a query runs
+    THEN the statement and its parameters should be logged as a slow query.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SLOW_QUERY_MS": 0.0001,
+    })
+    caplog.set_level(logging.WARNING, logger='sql.slow')
+
+    with app.app_context():
+        db.session.execute(db.text('SELECT :value'), {'value': 42})
+
+    assert 'Slow query' in caplog.text
+    assert 'SELECT ?' in caplog.text
+    assert '42' in caplog.text
@@ -1,4 +1,9 @@
+import json
 import logging
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models import User, Chat
+from request_logging import JsonFormatter
 
 
 def test_request_logging(client, caplog):
@@ -30,4 +35,67 @@ def test_404_logging(client, caplog):
 
     assert "Request: GET /non-existent-route-12345" in caplog.text
     # We might also want to assert that the status code is logged, depending on implementation
-    assert "404" in caplog.text
\ No newline at end of file
+    assert "404" in caplog.text
+
+def test_request_id_is_echoed_and_logged(client, caplog):
+    """
+    GIVEN a request carrying an X-Request-ID header
+    WHEN it is handled
+    THEN the id should be returned in the response and attached to the log record.
+    """
+    caplog.set_level(logging.INFO)
+
+    res = client.get('/hello', headers={'X-Request-ID': 'req-123'})
+
+    assert res.headers['X-Request-ID'] == 'req-123'
+    record = next(r for r in caplog.records if r.getMessage().startswith('Request: GET /hello'))
+    assert record.request_id == 'req-123'
+    assert record.endpoint == 'hello'
+
+
+def test_successful_polls_are_sampled(caplog):
+    """
+    GIVEN LOG_POLL_SAMPLE_RATE set to 0
+    WHEN a successful after_id poll and a failing poll are made
+    THEN only the failing one should be logged.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "LOG_POLL_SAMPLE_RATE": 0.0,
+    })
+    with app.app_context():
+        db.create_all()
+        alice = User(username='alice', email='alice@test.com', password_hash='x')
+        bob = User(username='bob', email='bob@test.com', password_hash='x')
+        db.session.add_all([alice, bob])
+        db.session.commit()
+        chat = Chat.create_direct(alice, bob)
+        db.session.add(chat)
+        db.session.commit()
+        chat_id = chat.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(alice.id))}'}
+    client = app.test_client()
+    caplog.set_level(logging.INFO)
+
+    client.get(f'/api/chats/{chat_id}/messages?after_id=0', headers=headers)
+    client.get(f'/api/chats/{chat_id + 1}/messages?after_id=0', headers=headers)
+
+    assert f"Request: GET /api/chats/{chat_id}/messages" not in caplog.text
+    assert f"Request: GET /api/chats/{chat_id + 1}/messages | Status: 404" in caplog.text
+
+
+def test_json_formatter_includes_extra_fields():
+    """
+    GIVEN a log record with extra fields
+    WHEN it is formatted as JSON
+    THEN the line should be valid JSON carrying the message and the extras.
+    """
+    record = logging.makeLogRecord({'name': 'app', 'levelname': 'INFO', 'msg': 'Request: %s', 'args': ('GET /',),
+                                    'duration_ms': 1.5, 'user_id': '7'})
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry['message'] == 'Request: GET /'
+    assert entry['duration_ms'] == 1.5
+    assert entry['user_id'] == '7'
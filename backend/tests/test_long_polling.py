@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import urllib.request
+import pytest
+from models import User
+from notifier import LocalNotifier
+
+
+def get_auth_header(client, email, password):
+    res = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f'Bearer {res.json["access_token"]}'}
+
+
+def setup_chat(client, app):
+    client.post('/api/auth/register', json={'username': 'waiter', 'email': 'wait@test.com', 'password': 'pw'})
+    client.post('/api/auth/register', json={'username': 'sender', 'email': 'send@test.com', 'password': 'pw'})
+    waiter_headers = get_auth_header(client, 'wait@test.com', 'pw')
+    sender_headers = get_auth_header(client, 'send@test.com', 'pw')
+
+    with app.app_context():
+        sender_id = User.query.filter_by(email='send@test.com').first().id
+    chat_id = client.post('/api/chats', json={'recipient_id': sender_id}, headers=waiter_headers).json['chat_id']
+    return waiter_headers, sender_headers, chat_id
+
+
+def test_local_notifier_wakes_only_its_chat():
+    """
+    GIVEN listeners on two chats
+    WHEN chat 1 is notified
+    THEN only the chat 1 listener should be woken.
+    """
+    notifier = LocalNotifier()
+    with notifier.listen(1) as chat_one, notifier.listen(2) as chat_two:
+        notifier.notify(1)
+        assert chat_one.is_set()
+        assert not chat_two.is_set()
+
+
+def test_long_poll_times_out_with_empty_list(client, app):
+    """
+    GIVEN a chat with no new messages
+    WHEN a client long-polls with a short wait
+    THEN the request should hold for the wait and return an empty list.
+    """
+    waiter_headers, _, chat_id = setup_chat(client, app)
+
+    started = time.monotonic()
+    res = client.get(f'/api/chats/{chat_id}/messages?after_id=0&wait=0.3', headers=waiter_headers)
+
+    assert res.status_code == 200
+    assert res.json == []
+    assert time.monotonic() - started >= 0.3
+
+
+def test_long_poll_is_woken_by_send_message(client, app):
+    """
+    GIVEN a client long-polling a chat with a generous wait
+    WHEN the other participant sends a message
+    THEN the poll should return that message well before the timeout.
+    """
+    waiter_headers, sender_headers, chat_id = setup_chat(client, app)
+
+    def send_later():
+        time.sleep(0.2)
+        app.test_client().post(
+            f'/api/chats/{chat_id}/messages',
+            json={'content': 'wake up'},
+            headers=sender_headers
+        )
+
+    sender = threading.Thread(target=send_later)
+    started = time.monotonic()
+    sender.start()
+    res = app.test_client().get(f'/api/chats/{chat_id}/messages?after_id=0&wait=10', headers=waiter_headers)
+    sender.join()
+
+    assert res.status_code == 200
+    assert [m['content'] for m in res.json] == ['wake up']
+    assert time.monotonic() - started < 5
+
+
+def test_waiting_long_polls_do_not_exhaust_the_served_worker(serve):
+    """
+    GIVEN Gunicorn started with the shipped config, one worker and a thread
+          budget of 2 (the pool a gthread worker would have)
+    WHEN four clients long-poll the same chat at once
+    THEN other requests should still be answered immediately
+    AND one new message should wake every waiter.
+    """
+    pytest.importorskip('geventwebsocket')
+    base = serve(GUNICORN_THREADS='2')
+
+    def call(method, path, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(base + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json', **(headers or {})})
+        with urllib.request.urlopen(req, timeout=15) as res:
+            return json.loads(res.read() or b'null')
+
+    headers = {}
+    for name in ('waiter', 'sender'):
+        call('POST', '/api/auth/register', {'username': name, 'email': f'{name}@test.com', 'password': 'pw'})
+        token = call('POST', '/api/auth/login', {'email': f'{name}@test.com', 'password': 'pw'})['access_token']
+        headers[name] = {'Authorization': f'Bearer {token}'}
+    sender_id = call('GET', '/api/users?q=sender@test.com', headers=headers['waiter'])[0]['id']
+    chat_id = call('POST', '/api/chats', {'recipient_id': sender_id}, headers['waiter'])['chat_id']
+
+    results = []
+    waiters = [
+        threading.Thread(target=lambda: results.append(
+            call('GET', f'/api/chats/{chat_id}/messages?after_id=0&wait=10', headers=headers['waiter'])))
+        for _ in range(4)
+    ]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.5)
+
+    started = time.monotonic()
+    urllib.request.urlopen(base + '/hello', timeout=5).close()
+    assert time.monotonic() - started < 1
+
+    call('POST', f'/api/chats/{chat_id}/messages', {'content': 'wake up'}, headers['sender'])
+    for waiter in waiters:
+        waiter.join(timeout=5)
+    assert [[m['content'] for m in page] for page in results] == [['wake up']] * 4
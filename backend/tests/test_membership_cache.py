@@ -0,0 +1,87 @@
+import time
+from cache import TTLCache, MISSING, get_membership_cache
+from models import User
+
+
+def get_auth_header(client, email, password):
+    res = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f'Bearer {res.json["access_token"]}'}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """
+    GIVEN a cache bounded to 2 entries
+    WHEN a third key is stored after touching the first one
+    THEN the least recently used key should be evicted.
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_ttl_cache_expires_entries():
+    """
+    GIVEN a cache with a very short TTL
+    WHEN an entry outlives it
+    THEN it should be reported as a miss, even for falsy values.
+    """
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set('denied', False)
+    assert cache.get('denied') is False
+
+    time.sleep(0.02)
+    assert cache.get('denied') is MISSING
+
+
+def test_steady_state_polling_skips_participants_query(client, app, capture_queries):
+    """
+    GIVEN a participant who already polled a chat once
+    WHEN they poll again
+    THEN no participants query should be issued and the cache should record a hit.
+    """
+    client.post('/api/auth/register', json={'username': 'poller', 'email': 'poll@test.com', 'password': 'pw'})
+    client.post('/api/auth/register', json={'username': 'peer', 'email': 'peer@test.com', 'password': 'pw'})
+    headers = get_auth_header(client, 'poll@test.com', 'pw')
+
+    with app.app_context():
+        peer_id = User.query.filter_by(email='peer@test.com').first().id
+    chat_id = client.post('/api/chats', json={'recipient_id': peer_id}, headers=headers).json['chat_id']
+
+    client.get(f'/api/chats/{chat_id}/messages?after_id=0', headers=headers)
+
+    with capture_queries() as statements:
+        res = client.get(f'/api/chats/{chat_id}/messages?after_id=0', headers=headers)
+
+    assert res.status_code == 200
+    assert not any('participants' in s for s in statements)
+    assert get_membership_cache().stats()['hits'] >= 1
+
+
+def test_delete_profile_invalidates_membership(client, app):
+    """
+    GIVEN a user whose chat membership is cached
+    WHEN they delete their account
+    THEN their cached entries should be dropped.
+    """
+    client.post('/api/auth/register', json={'username': 'leaver', 'email': 'leave@test.com', 'password': 'pw'})
+    client.post('/api/auth/register', json={'username': 'stayer', 'email': 'stay@test.com', 'password': 'pw'})
+    headers = get_auth_header(client, 'leave@test.com', 'pw')
+
+    with app.app_context():
+        leaver_id = User.query.filter_by(email='leave@test.com').first().id
+        stayer_id = User.query.filter_by(email='stay@test.com').first().id
+    chat_id = client.post('/api/chats', json={'recipient_id': stayer_id}, headers=headers).json['chat_id']
+    client.get(f'/api/chats/{chat_id}/messages', headers=headers)
+
+    cache = get_membership_cache()
+    assert cache.get((leaver_id, chat_id)) is True
+
+    client.delete('/api/profile', headers=headers)
+    assert cache.get((leaver_id, chat_id)) is MISSING
@@ -0,0 +1,131 @@
+from app import db
+from models import Chat, Message
+from search import _newest_matches
+
+
+def setup_chat(client, login):
+    alice = login('alice')
+    bob = login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    return alice, bob, chat_id
+
+
+def send(client, chat_id, content, headers):
+    return client.post(f'/api/chats/{chat_id}/messages', json={'content': content}, headers=headers).json
+
+
+def search(client, headers, **params):
+    return client.get('/api/messages/search', query_string=params, headers=headers)
+
+
+def test_search_is_scoped_and_ranked(client, login):
+    """
+    GIVEN Alice and Bob's chat, and Carol's separate chat, all mentioning pizza
+    WHEN Bob searches for "pizza"
+    THEN only his chat's messages should match, the denser match first,
+    and several words should all have to match.
+    """
+    alice, bob, chat_id = setup_chat(client, login)
+    once = send(client, chat_id, 'pizza tonight? the place near the station, or somewhere else', alice)
+    twice = send(client, chat_id, 'pizza pizza', bob)
+    send(client, chat_id, 'no food talk here', alice)
+    carol = login('carol')
+    other_chat = client.post('/api/chats', json={'recipient_id': 1}, headers=carol).json['chat_id']
+    send(client, other_chat, 'secret pizza', carol)
+
+    res = search(client, bob, q='pizza')
+    assert res.status_code == 200
+    assert [m['id'] for m in res.json] == [twice['id'], once['id']]
+    assert res.json[0]['score'] > res.json[1]['score']
+
+    assert [m['id'] for m in search(client, bob, q='Tonight pizza').json] == [once['id']]
+
+
+def test_index_follows_edit_and_delete(client, login):
+    """
+    GIVEN a message about cats
+    WHEN it is edited to be about dogs, and then deleted
+    THEN search should find it by the new word only, and then not at all.
+    """
+    alice, _, chat_id = setup_chat(client, login)
+    message = send(client, chat_id, 'I love cats', alice)
+
+    client.put(f"/api/messages/{message['id']}", json={'content': 'I love dogs'}, headers=alice)
+    assert search(client, alice, q='cats').json == []
+    assert [m['id'] for m in search(client, alice, q='dogs').json] == [message['id']]
+
+    client.delete(f"/api/messages/{message['id']}", headers=alice)
+    assert search(client, alice, q='dogs').json == []
+
+
+def test_search_pages_follow_cursor(client, login):
+    """
+    GIVEN five matching messages
+    WHEN results are fetched two at a time following X-Next-Cursor
+    THEN every message should be returned exactly once.
+    """
+    alice, _, chat_id = setup_chat(client, login)
+    ids = {send(client, chat_id, f'report {i}', alice)['id'] for i in range(5)}
+
+    seen, cursor = [], None
+    while True:
+        res = search(client, alice, q='report', limit=2, **({'cursor': cursor} if cursor else {}))
+        seen += [m['id'] for m in res.json]
+        if res.headers['X-Has-More'] == 'false':
+            break
+        cursor = res.headers['X-Next-Cursor']
+
+    assert sorted(seen) == sorted(ids)
+
+
+def test_search_rejects_empty_query(client, login):
+    """
+    GIVEN a logged-in user
+    WHEN they search with no words, or with FTS operators
+    THEN empty queries should get 400 and operators be searched as plain words.
+    """
+    alice, _, _ = setup_chat(client, login)
+
+    assert search(client, alice, q='').status_code == 400
+    assert search(client, alice, q='"*" (').status_code == 400
+    assert search(client, alice, q='cats AND (NEAR').status_code == 200
+
+
+def test_accented_words_are_scored(client, login):
+    """
+    GIVEN a message written with accents
+    WHEN it is searched for without them, and the other way round
+    THEN it should match with a positive score both times.
+    """
+    alice, _, chat_id = setup_chat(client, login)
+    accented = send(client, chat_id, 'Rendez-vous au Café à midi', alice)
+    plain = send(client, chat_id, 'the cafe menu', alice)
+
+    res = search(client, alice, q='cafe')
+    assert {m['id'] for m in res.json} == {accented['id'], plain['id']}
+    assert all(m['score'] > 0 for m in res.json)
+
+    res = search(client, alice, q='CAFÉ')
+    assert all(m['score'] > 0 for m in res.json)
+
+
+def test_newest_matches_probe_growing_id_ranges(app, monkeypatch):
+    """
+    GIVEN 30 messages of which every third matches, and a first probe of 5 ids
+    WHEN the newest 4 matches are requested
+    THEN they should be found by widening the range, and a window larger than
+    the matches should return all of them.
+    """
+    chat = Chat()
+    db.session.add(chat)
+    db.session.flush()
+    db.session.add_all(
+        Message(content='match' if i % 3 == 0 else 'other', chat_id=chat.id) for i in range(1, 31)
+    )
+    db.session.commit()
+    matches = db.select(Message.id, db.literal(1.0)).where(Message.content == 'match')
+    monkeypatch.setattr('search.PROBE_SPAN', 5)
+    monkeypatch.setattr('search.PROBE_GROWTH', 2)
+
+    assert [row[0] for row in _newest_matches(matches, 4, 30)] == [30, 27, 24, 21]
+    assert [row[0] for row in _newest_matches(matches, 50, 30)] == list(range(30, 0, -3))
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+def test_latency_histogram_by_endpoint(client):
+    """
+    GIVEN a running app
+    WHEN a routed and an unknown URL are requested
+    THEN each should be counted in the latency histogram under its endpoint name.
+    """
+    labels = {'method': 'GET', 'endpoint': 'hello', 'status': '200'}
+    unmatched = {'method': 'GET', 'endpoint': 'unmatched', 'status': '404'}
+    before = sample('http_request_duration_seconds_count', labels)
+    before_unmatched = sample('http_request_duration_seconds_count', unmatched)
+
+    client.get('/hello')
+    client.get('/no-such-page-42')
+
+    assert sample('http_request_duration_seconds_count', labels) == before + 1
+    assert sample('http_request_duration_seconds_count', unmatched) == before_unmatched + 1
+    assert sample('http_requests_in_progress') == 0
+
+
+def test_metrics_endpoint_counts_sent_messages(client):
+    """
+    GIVEN two users with a chat
+    WHEN a message is sent and /metrics is scraped
+    THEN the message counter and the endpoint histogram should be exposed.
+    """
+    for name in ('alice', 'bob'):
+        client.post('/api/auth/register', json={'username': name, 'email': f'{name}@test.com', 'password': 'pw'})
+    token = client.post('/api/auth/login', json={'email': 'alice@test.com', 'password': 'pw'}).json['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=headers).json['chat_id']
+    before = sample('messages_sent_total')
+
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'hi'}, headers=headers)
+    res = client.get('/metrics')
+
+    assert sample('messages_sent_total') == before + 1
+    assert b'endpoint="chat.send_message"' in res.data
+    assert b'socketio_connections' in res.data
+
+
+def test_multiprocess_samples_are_aggregated(tmp_path):
+    """
+    GIVEN PROMETHEUS_MULTIPROC_DIR shared by two worker processes
+    WHEN each of them sends a message
+    THEN a scrape should report the sum over both processes.
+    """
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    script = 'from metrics import MESSAGES_SENT; MESSAGES_SENT.inc()'
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+
+    assert b'messages_sent_total 2.0' in generate_latest(registry)
+
+
+def test_cache_totals_are_monotonic_counters(app):
+    """
+    GIVEN membership cache hits recorded by one app, then by a fresh app whose stats start at zero
+    WHEN the process stats are snapshotted after each
+    THEN the hits should be exported as a counter that only grows.
+    """
+    from app import create_app
+    from cache import get_membership_cache
+    from metrics import _snapshot_process_stats
+
+    def hit_and_snapshot(current):
+        cache = get_membership_cache()
+        cache.set('key', True)
+        cache.get('key')
+        _snapshot_process_stats(current)
+        return sample('membership_cache_hits_total')
+
+    first = hit_and_snapshot(app)
+    fresh = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with fresh.app_context():
+        second = hit_and_snapshot(fresh)
+
+    assert second == first + 1
+    assert b'# TYPE membership_cache_hits_total counter' in generate_latest(REGISTRY)
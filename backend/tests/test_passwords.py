@@ -0,0 +1,143 @@
+import threading
+import time
+import urllib.request
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from models import User
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_login_upgrades_outdated_hash(client, app):
+    """
+    GIVEN a user whose password was hashed with an older, cheaper method
+    WHEN they log in successfully
+    THEN the stored hash should be replaced by one made with the configured method.
+    """
+    db.session.add(User(
+        username='old', email='old@test.com',
+        password_hash=generate_password_hash('pw', 'pbkdf2:sha256:1000')
+    ))
+    db.session.commit()
+
+    res = client.post('/api/auth/login', json={'email': 'old@test.com', 'password': 'pw'})
+
+    assert res.status_code == 200
+    stored = db.session.get(User, 1).password_hash
+    assert stored.startswith('scrypt:')
+    assert client.post('/api/auth/login', json={'email': 'old@test.com', 'password': 'pw'}).status_code == 200
+
+
+def test_login_succeeds_when_rehash_is_busy(client, app, monkeypatch):
+    """
+    GIVEN a user with an outdated hash and a hasher that is saturated by the time they are verified
+    WHEN they log in with the right password
+    THEN they should get a token, and the upgrade should be left for a later login.
+    """
+    old_hash = generate_password_hash('pw', 'pbkdf2:sha256:1000')
+    db.session.add(User(username='old', email='old@test.com', password_hash=old_hash))
+    db.session.commit()
+
+    def busy(password):
+        raise PasswordHasherBusy()
+
+    monkeypatch.setattr(app.extensions['password_hasher'], 'hash', busy)
+    res = client.post('/api/auth/login', json={'email': 'old@test.com', 'password': 'pw'})
+
+    assert res.status_code == 200
+    assert 'access_token' in res.json
+    assert db.session.get(User, 1).password_hash == old_hash
+
+
+def test_needs_rehash_compares_method_and_cost():
+    """
+    GIVEN a hasher configured for pbkdf2 with 1000 iterations
+    WHEN hashes with other iterations, another method and its own settings are checked
+    THEN only its own hashes should be considered current.
+    """
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+
+    assert not hasher.needs_rehash(hasher.hash('pw'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'pbkdf2:sha256:2000'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'scrypt'))
+
+
+def test_slot_is_free_as_soon_as_a_hash_returns():
+    """
+    GIVEN a hasher with one thread and no queue
+    WHEN hashes and verifications are made back to back by one caller
+    THEN none of them should be rejected as busy.
+    """
+    hasher = PasswordHasher(method='pbkdf2:sha256:1', workers=1, max_pending=0)
+
+    for _ in range(200):
+        assert hasher.verify(hasher.hash('pw'), 'pw')
+
+
+def test_saturated_hasher_returns_503():
+    """
+    GIVEN a hasher with one thread, no queue, and a hash already in progress
+    WHEN another user logs in
+    THEN the login should fail fast with 503 and Retry-After instead of waiting.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "PASSWORD_HASH_WORKERS": 1,
+        "PASSWORD_HASH_MAX_PENDING": 0,
+    })
+    hasher = app.extensions['password_hasher']
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait()
+
+    blocker = threading.Thread(target=hasher._run, args=(slow_hash,))
+
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        blocker.start()
+        started.wait()
+        try:
+            res = client.post('/api/auth/register', json={
+                'username': 'late', 'email': 'late@test.com', 'password': 'pw'
+            })
+        finally:
+            release.set()
+            blocker.join()
+
+        assert res.status_code == 503
+        assert res.headers['Retry-After'] == '1'
+        db.session.remove()
+        db.drop_all()
+
+
+def test_hash_does_not_block_the_evented_worker(serve):
+    """
+    GIVEN Gunicorn with the default gevent worker and a hash that takes about a second
+    WHEN a user registers
+    THEN a cheap request sent meanwhile should be answered without waiting for the hash.
+    """
+    pytest.importorskip('geventwebsocket')
+    base = serve(PASSWORD_HASH_METHOD='pbkdf2:sha256:3000000')
+    register = urllib.request.Request(
+        base + '/api/auth/register', method='POST', headers={'Content-Type': 'application/json'},
+        data=b'{"username": "slow", "email": "slow@test.com", "password": "pw"}'
+    )
+    durations = {}
+
+    def timed(name, request):
+        started = time.monotonic()
+        urllib.request.urlopen(request, timeout=30).close()
+        durations[name] = time.monotonic() - started
+
+    registering = threading.Thread(target=timed, args=('register', register))
+    registering.start()
+    time.sleep(0.2)
+    timed('hello', base + '/hello')
+    registering.join()
+
+    assert durations['register'] > 0.5
+    assert durations['hello'] < 0.2
@@ -0,0 +1,134 @@
+import pytest
+from app import create_app, db
+from cache import LocalProfileBackend, ProfileCache
+from models import Chat, User
+
+
+class FakeProfileBackend:
+    """Dict-backed stand-in for a shared store that records every call."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    def get_many(self, keys):
+        keys = list(keys)
+        self.calls.append(('get_many', sorted(keys)))
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_many(self, mapping):
+        self.calls.append(('set_many', sorted(mapping)))
+        self.data.update(mapping)
+
+    def delete(self, key):
+        self.calls.append(('delete', key))
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def backend():
+    return FakeProfileBackend()
+
+
+@pytest.fixture
+def app(backend):
+    """Overrides the conftest app to use the fake backend (client and login build on it)."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "PROFILE_CACHE_BACKEND": backend,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_profile_is_read_through(client, login, backend):
+    """
+    GIVEN an injected profile cache backend
+    WHEN the profile is requested twice
+    THEN it should be loaded from the database once and served from the cache afterwards.
+    """
+    headers = login('alice')
+
+    first = client.get('/api/profile', headers=headers)
+    second = client.get('/api/profile', headers=headers)
+
+    assert first.json == second.json == {'id': 1, 'username': 'alice', 'email': 'alice@test.com'}
+    assert backend.calls.count(('set_many', [1])) == 1
+
+
+def test_update_and_delete_invalidate_profile(client, login, backend):
+    """
+    GIVEN a cached profile
+    WHEN the user renames themselves and then deletes the account
+    THEN the cache entry should be dropped both times and never served stale.
+    """
+    headers = login('alice')
+    client.get('/api/profile', headers=headers)
+
+    client.put('/api/profile', json={'username': 'alicia'}, headers=headers)
+    assert ('delete', 1) in backend.calls
+    assert client.get('/api/profile', headers=headers).json['username'] == 'alicia'
+
+    client.delete('/api/profile', headers=headers)
+    assert 1 not in backend.data
+
+
+def test_chat_list_partners_come_from_cache(client, login, backend):
+    """
+    GIVEN Alice with a chat to Bob, whose profile is already cached
+    WHEN Bob renames himself
+    THEN Alice's chat list should show the new name after the invalidation.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    client.post('/api/chats', json={'recipient_id': 2}, headers=alice)
+    assert client.get('/api/chats', headers=alice).json[0]['partner_username'] == 'bob'
+
+    client.put('/api/profile', json={'username': 'robert'}, headers=bob)
+
+    assert client.get('/api/chats', headers=alice).json[0]['partner_username'] == 'robert'
+
+
+def test_local_backend_counts_hits_and_misses(app):
+    """
+    GIVEN the default in-process backend and one user
+    WHEN the same and an unknown id are looked up
+    THEN existing users should be cached and unknown ids reported as misses.
+    """
+    db.session.add(User(username='solo', email='solo@test.com', password_hash='x'))
+    db.session.commit()
+    cache = ProfileCache(LocalProfileBackend(maxsize=10, ttl=60))
+
+    assert cache.get_many([1, 99]) == {1: {'id': 1, 'username': 'solo', 'email': 'solo@test.com'}}
+    assert cache.get(1)['username'] == 'solo'
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+
+
+def test_chat_list_etag_follows_the_served_partner_name(client, login, backend):
+    """
+    GIVEN Alice's cached chat list, and a rename of Bob made elsewhere that left this
+          process's profile cache holding his old name
+    WHEN she revalidates before and after the stale entry expires
+    THEN each revalidation should return the name it serves, never a 304 that keeps the stale one.
+    """
+    alice = login('alice')
+    login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    etag = client.get('/api/chats', headers=alice).headers['ETag']
+
+    db.session.execute(db.update(User).where(User.id == 2).values(username='robert'))
+    Chat.touch_members([chat_id])
+    db.session.commit()
+
+    stale = client.get('/api/chats', headers={**alice, 'If-None-Match': etag})
+    assert stale.status_code == 200
+    assert stale.json[0]['partner_username'] == 'bob'
+
+    backend.data.pop(2)
+    fresh = client.get('/api/chats', headers={**alice, 'If-None-Match': stale.headers['ETag']})
+    assert fresh.status_code == 200
+    assert fresh.json[0]['partner_username'] == 'robert'
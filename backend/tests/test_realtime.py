@@ -0,0 +1,157 @@
+import socketio as python_socketio
+from extensions import socketio
+from models import User
+from realtime import _RelayedUserActions, chat_room, user_room
+
+
+def get_token(client, email, password):
+    res = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return res.json['access_token']
+
+
+def setup_chat(client, app):
+    """Registers alice and bob, creates their chat and returns (alice_token, bob_token, chat_id)."""
+    client.post('/api/auth/register', json={'username': 'alice', 'email': 'alice@test.com', 'password': 'pw'})
+    client.post('/api/auth/register', json={'username': 'bob', 'email': 'bob@test.com', 'password': 'pw'})
+    token_alice = get_token(client, 'alice@test.com', 'pw')
+    token_bob = get_token(client, 'bob@test.com', 'pw')
+
+    with app.app_context():
+        bob_id = User.query.filter_by(email='bob@test.com').first().id
+
+    res = client.post('/api/chats', json={'recipient_id': bob_id}, headers={'Authorization': f'Bearer {token_alice}'})
+    return token_alice, token_bob, res.json['chat_id']
+
+
+def test_socket_rejects_missing_token(app):
+    """
+    GIVEN the Socket.IO endpoint
+    WHEN a client connects without a JWT
+    THEN the connection should be refused.
+    """
+    socket_client = socketio.test_client(app)
+    assert not socket_client.is_connected()
+
+
+def test_participant_receives_message_events(client, app):
+    """
+    GIVEN bob subscribed to his chat over Socket.IO
+    WHEN alice sends, edits and deletes a message through the REST API
+    THEN bob should receive new_message, message_edited and message_deleted events.
+    """
+    token_alice, token_bob, chat_id = setup_chat(client, app)
+    headers = {'Authorization': f'Bearer {token_alice}'}
+
+    socket_client = socketio.test_client(app, auth={'token': token_bob})
+    assert socket_client.is_connected()
+
+    ack = socket_client.emit('join_chat', {'chat_id': chat_id}, callback=True)
+    assert ack['ok'] is True
+
+    sent = client.post(f'/api/chats/{chat_id}/messages', json={'content': 'Hi Bob'}, headers=headers)
+    msg_id = sent.json['id']
+    client.put(f'/api/messages/{msg_id}', json={'content': 'Hi Bob!'}, headers=headers)
+    client.delete(f'/api/messages/{msg_id}', headers=headers)
+
+    events = socket_client.get_received()
+    names = [e['name'] for e in events]
+    assert names == ['new_message', 'message_edited', 'message_deleted']
+    assert events[0]['args'][0]['content'] == 'Hi Bob'
+    assert events[1]['args'][0]['content'] == 'Hi Bob!'
+    assert events[2]['args'][0] == {'id': msg_id, 'chat_id': chat_id}
+
+
+def test_outsider_cannot_join_chat(client, app):
+    """
+    GIVEN a chat between alice and bob
+    WHEN eve tries to subscribe to it over Socket.IO
+    THEN the join should be denied and no events delivered.
+    """
+    token_alice, _, chat_id = setup_chat(client, app)
+    client.post('/api/auth/register', json={'username': 'eve', 'email': 'eve@test.com', 'password': 'pw'})
+    token_eve = get_token(client, 'eve@test.com', 'pw')
+
+    socket_client = socketio.test_client(app, auth={'token': token_eve})
+    ack = socket_client.emit('join_chat', {'chat_id': chat_id}, callback=True)
+    assert ack['error'] == 'Access denied'
+
+    client.post(
+        f'/api/chats/{chat_id}/messages',
+        json={'content': 'secret'},
+        headers={'Authorization': f'Bearer {token_alice}'}
+    )
+    assert socket_client.get_received() == []
+
+
+class BusManager(_RelayedUserActions, python_socketio.PubSubManager):
+    """Pub/sub client manager whose "queue" delivers straight to the other managers on `bus`."""
+
+    def __init__(self, bus):
+        super().__init__()
+        self.bus = bus
+        bus.append(self)
+
+    def _publish(self, data):
+        for node in self.bus:
+            if node is not self and data['method'] == 'close_room':
+                node._handle_close_room(data)
+
+
+def test_eviction_reaches_sockets_on_other_processes():
+    """
+    GIVEN two server processes sharing a message queue, with user 2's socket
+          connected to the second one and subscribed to chat 7
+    WHEN the first process evicts user 2 from chat 7
+    THEN the socket should leave chat 7's room on the second process, keeping its other rooms.
+    """
+    bus = []
+    local, remote = BusManager(bus), BusManager(bus)
+    for manager in bus:
+        python_socketio.Server(client_manager=manager, async_mode='threading')
+    sid = remote.connect('eio-1', '/')
+    for room in (user_room(2), chat_room(7), chat_room(8)):
+        remote.enter_room(sid, '/', room)
+
+    local.evict_user(2, 7)
+
+    assert [s for s, _ in remote.get_participants('/', chat_room(7))] == []
+    assert [s for s, _ in remote.get_participants('/', chat_room(8))] == [sid]
+
+
+def test_disconnect_reaches_sockets_on_other_processes(monkeypatch):
+    """
+    GIVEN two server processes sharing a message queue, with sockets of users 2 and 3 on the second one
+    WHEN the first process disconnects user 2
+    THEN only user 2's socket should be disconnected on the second process.
+    """
+    bus = []
+    local, remote = BusManager(bus), BusManager(bus)
+    servers = [python_socketio.Server(client_manager=manager, async_mode='threading') for manager in bus]
+    disconnected = []
+    monkeypatch.setattr(servers[1], 'disconnect', lambda sid, **kwargs: disconnected.append(sid))
+    sids = {}
+    for user_id in (2, 3):
+        sids[user_id] = remote.connect(f'eio-{user_id}', '/')
+        remote.enter_room(sids[user_id], '/', user_room(user_id))
+
+    local.disconnect_user(2)
+
+    assert disconnected == [sids[2]]
+
+
+def test_removed_member_stops_receiving_group_events(client, login):
+    """
+    GIVEN bob subscribed over Socket.IO to a group he is a member of
+    WHEN alice removes him and then sends a message
+    THEN bob's socket should not receive it.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    chat_id = client.post('/api/chats/groups', json={'name': 'G', 'member_ids': [2]}, headers=alice).json['chat_id']
+    socket_client = socketio.test_client(client.application, auth={'token': bob['Authorization'].split()[1]})
+    assert socket_client.emit('join_chat', {'chat_id': chat_id}, callback=True)['ok'] is True
+
+    client.delete(f'/api/chats/{chat_id}/members/2', headers=alice)
+    client.post(f'/api/chats/{chat_id}/messages', json={'content': 'bob is gone'}, headers=alice)
+
+    assert socket_client.get_received() == []
@@ -43,4 +43,20 @@ def test_cannot_access_others_chat(client, app):
 
     # 4. Assert Forbidden
     assert response.status_code == 403
-    assert "Access denied" in response.json['error']
\ No newline at end of file
+    assert "Access denied" in response.json['error']
+
+def test_chat_scoped_routes_report_missing_chat(client, app):
+    """
+    GIVEN a logged in user
+    WHEN they read or post to a chat id that does not exist
+    THEN the API should return 404 rather than 403.
+    """
+    client.post('/api/auth/register', json={'username': 'solo', 'email': 'solo@test.com', 'password': 'pw'})
+    headers = {'Authorization': f'Bearer {get_token(client, "solo@test.com", "pw")}'}
+
+    res_get = client.get('/api/chats/9999/messages', headers=headers)
+    res_post = client.post('/api/chats/9999/messages', json={'content': 'hi'}, headers=headers)
+
+    assert res_get.status_code == 404
+    assert res_post.status_code == 404
+    assert 'Chat not found' in res_post.json['error']
@@ -0,0 +1,55 @@
+import pytest
+from app import db
+from models import User
+from seeding import BulkWriter, chat_pairs
+
+
+def test_copy_lists_only_the_columns_present_in_the_rows():
+    """
+    GIVEN seeded user rows without token_version (a NOT NULL column with a server default)
+    WHEN the COPY payload for them is built
+    THEN only the given columns should be listed, so Postgres fills in the default instead of NULL.
+    """
+    rows = [
+        {'id': 1, 'username': 'user1', 'email': 'user1@load.test', 'password_hash': 'h'},
+        {'id': 2, 'username': 'user2', 'email': 'user2@load.test', 'password_hash': None},
+    ]
+
+    statement, buffer = BulkWriter.copy_payload('users', rows)
+
+    assert statement == 'COPY users (id, username, email, password_hash) FROM STDIN WITH (FORMAT csv)'
+    assert buffer.read().splitlines() == ['1,user1,user1@load.test,h', '2,user2,user2@load.test,']
+
+
+@pytest.mark.parametrize('users, chats_per_user', [(3, 2), (4, 3), (5, 4), (6, 5), (7, 6)])
+def test_chat_pairs_never_repeat(users, chats_per_user):
+    """
+    GIVEN the largest chats_per_user allowed for small user counts
+    WHEN the pairs are generated
+    THEN no pair should repeat or pair a user with themselves.
+    """
+    pairs = list(chat_pairs(users, chats_per_user))
+
+    assert len(pairs) == len(set(pairs))
+    assert all(low < high for low, high in pairs)
+
+
+def test_seed_db_rejects_impossible_sizes_before_dropping(app):
+    """
+    GIVEN a database with an existing user
+    WHEN seed_db is asked for at least as many chats per user as there are users
+    THEN it should fail with a usage error and leave the data in place.
+    """
+    db.session.add(User(username='keep', email='keep@test.com', password_hash='x'))
+    db.session.commit()
+
+    for users, chats_per_user in ((3, 4), (4, 6), (4, 4)):
+        result = app.test_cli_runner().invoke(args=[
+            'seed_db', '--users', str(users), '--chats-per-user', str(chats_per_user)
+        ])
+        assert result.exit_code == 2, result.output
+        assert 'chats_per_user' in result.output
+
+    assert User.query.filter_by(username='keep').count() == 1
+    with pytest.raises(ValueError):
+        list(chat_pairs(4, 4))
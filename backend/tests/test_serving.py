@@ -0,0 +1,48 @@
+import os
+import runpy
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), '..', 'gunicorn.conf.py')
+
+
+def test_gunicorn_defaults(monkeypatch):
+    """
+    GIVEN no serving environment variables
+    WHEN the Gunicorn config is loaded
+    THEN it should use a single evented gevent worker on port 5000
+    AND run Socket.IO in the matching async mode.
+    """
+    for name in ('GUNICORN_BIND', 'PORT', 'WEB_CONCURRENCY', 'GUNICORN_WORKER_CLASS', 'GUNICORN_RELOAD'):
+        monkeypatch.delenv(name, raising=False)
+    # Recorded first so the value the config sets is removed afterwards.
+    monkeypatch.setenv('SOCKETIO_ASYNC_MODE', '')
+    monkeypatch.delenv('SOCKETIO_ASYNC_MODE')
+
+    conf = runpy.run_path(GUNICORN_CONF)
+
+    assert conf['bind'] == '0.0.0.0:5000'
+    assert conf['workers'] == 1
+    assert conf['worker_class'] == 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+    assert os.environ['SOCKETIO_ASYNC_MODE'] == 'gevent'
+    assert conf['reload'] is False
+
+
+def test_gunicorn_reads_environment(monkeypatch):
+    """
+    GIVEN worker, threading and keep-alive settings in the environment
+    WHEN the Gunicorn config is loaded
+    THEN those values should be applied.
+    """
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gthread')
+    monkeypatch.setenv('SOCKETIO_ASYNC_MODE', 'threading')
+    monkeypatch.setenv('GUNICORN_THREADS', '8')
+    monkeypatch.setenv('GUNICORN_KEEPALIVE', '75')
+    monkeypatch.setenv('PORT', '8080')
+
+    conf = runpy.run_path(GUNICORN_CONF)
+
+    assert conf['workers'] == 4
+    assert conf['worker_class'] == 'gthread'
+    assert conf['threads'] == 8
+    assert conf['keepalive'] == 75
+    assert conf['bind'] == '0.0.0.0:8080'
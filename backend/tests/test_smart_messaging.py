@@ -46,4 +46,73 @@ def test_pagination_and_delta_updates(client, app):
     assert res_delta.status_code == 200
     # Should get messages 6, 7, 8, 9, 10 (Total 5)
     assert len(res_delta.json) == 5
-    assert res_delta.json[0]['id'] > fifth_msg_id
\ No newline at end of file
+    assert res_delta.json[0]['id'] > fifth_msg_id
+
+def test_history_pages_report_has_more(client, app):
+    """
+    GIVEN a chat with 7 messages
+    WHEN history is paged backwards with limit=3 following X-Next-Cursor
+    THEN pages should be contiguous and X-Has-More should turn false on the last page.
+    """
+    client.post('/api/auth/register', json={'username': 'scroller', 'email': 'scroll@test.com', 'password': 'pw'})
+    headers = get_auth_header(client, 'scroll@test.com', 'pw')
+
+    with app.app_context():
+        user = User.query.filter_by(email='scroll@test.com').first()
+        chat = Chat()
+        chat.participants.append(user)
+        db.session.add(chat)
+        for i in range(7):
+            db.session.add(Message(content=f"Msg {i}", author=user, chat=chat))
+        db.session.commit()
+        chat_id = chat.id
+
+    pages = []
+    url = f'/api/chats/{chat_id}/messages?limit=3'
+    while True:
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        pages.append([m['content'] for m in res.json])
+        if res.headers['X-Has-More'] != 'true':
+            assert 'X-Next-Cursor' not in res.headers
+            break
+        url = f'/api/chats/{chat_id}/messages?limit=3&before_id={res.headers["X-Next-Cursor"]}'
+
+    assert pages == [
+        ['Msg 4', 'Msg 5', 'Msg 6'],
+        ['Msg 1', 'Msg 2', 'Msg 3'],
+        ['Msg 0'],
+    ]
+
+
+def test_polling_is_bounded_and_resumable(client, app):
+    """
+    GIVEN a chat with more messages than the server-side page cap
+    WHEN a client catches up from after_id=0 with an oversized limit
+    THEN each page should be capped and X-Next-Cursor should resume where it stopped.
+    """
+    app.config['MESSAGES_PAGE_MAX'] = 4
+    client.post('/api/auth/register', json={'username': 'returner', 'email': 'back@test.com', 'password': 'pw'})
+    headers = get_auth_header(client, 'back@test.com', 'pw')
+
+    with app.app_context():
+        user = User.query.filter_by(email='back@test.com').first()
+        chat = Chat()
+        chat.participants.append(user)
+        db.session.add(chat)
+        for i in range(10):
+            db.session.add(Message(content=f"Msg {i}", author=user, chat=chat))
+        db.session.commit()
+        chat_id = chat.id
+
+    received = []
+    cursor = 0
+    while True:
+        res = client.get(f'/api/chats/{chat_id}/messages?after_id={cursor}&limit=1000', headers=headers)
+        assert len(res.json) <= 4
+        received.extend(m['content'] for m in res.json)
+        if res.headers['X-Has-More'] != 'true':
+            break
+        cursor = int(res.headers['X-Next-Cursor'])
+
+    assert received == [f"Msg {i}" for i in range(10)]
@@ -0,0 +1,91 @@
+def send(client, chat_id, content, headers):
+    return client.post(f'/api/chats/{chat_id}/messages', json={'content': content}, headers=headers).json
+
+
+def test_sync_returns_new_messages_per_chat(client, login):
+    """
+    GIVEN Alice in chats with Bob and Carol, having seen the first message of each
+    WHEN she syncs both chats plus one she is not in
+    THEN she should get only the newer messages of each chat, and the foreign chat as denied.
+    """
+    alice = login('alice')
+    bob = login('bob')
+    carol = login('carol')
+    bob_chat = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    carol_chat = client.post('/api/chats', json={'recipient_id': 3}, headers=alice).json['chat_id']
+    foreign = client.post('/api/chats', json={'recipient_id': 3}, headers=bob).json['chat_id']
+
+    seen_bob = send(client, bob_chat, 'hi', bob)['id']
+    seen_carol = send(client, carol_chat, 'hey', carol)['id']
+    new_bob = [send(client, bob_chat, f'b{i}', bob)['id'] for i in range(2)]
+    new_carol = send(client, carol_chat, 'c', carol)['id']
+
+    res = client.post('/api/sync', json={'chats': {
+        str(bob_chat): seen_bob, str(carol_chat): seen_carol, str(foreign): 0
+    }}, headers=alice)
+
+    assert res.status_code == 200
+    assert [m['id'] for m in res.json['chats'][str(bob_chat)]['messages']] == new_bob
+    assert [m['id'] for m in res.json['chats'][str(carol_chat)]['messages']] == [new_carol]
+    assert res.json['denied'] == [foreign]
+
+
+def test_sync_caps_each_chat(client, login):
+    """
+    GIVEN a chat with five unseen messages
+    WHEN the client syncs with limit 2 and follows next_cursor
+    THEN each response should hold at most two messages and flag has_more until caught up.
+    """
+    alice = login('alice')
+    login('bob')
+    chat_id = client.post('/api/chats', json={'recipient_id': 2}, headers=alice).json['chat_id']
+    ids = [send(client, chat_id, f'm{i}', alice)['id'] for i in range(5)]
+
+    seen, cursor = [], 0
+    while True:
+        res = client.post('/api/sync', json={'chats': {str(chat_id): cursor}, 'limit': 2}, headers=alice)
+        page = res.json['chats'].get(str(chat_id))
+        if not page:
+            break
+        assert len(page['messages']) <= 2
+        seen += [m['id'] for m in page['messages']]
+        cursor = page['next_cursor']
+        if not page['has_more']:
+            break
+
+    assert seen == ids
+
+
+def test_sync_is_two_queries_regardless_of_chat_count(client, login, capture_queries):
+    """
+    GIVEN Alice in ten chats, each with a new message
+    WHEN she syncs all of them (caches already warm)
+    THEN the request should run one membership query and one message query.
+    """
+    alice = login('alice')
+    chat_ids = []
+    for i in range(10):
+        login(f'friend{i}')
+        chat_id = client.post('/api/chats', json={'recipient_id': i + 2}, headers=alice).json['chat_id']
+        send(client, chat_id, 'ping', alice)
+        chat_ids.append(chat_id)
+    body = {'chats': {str(chat_id): 0 for chat_id in chat_ids}}
+    client.post('/api/sync', json=body, headers=alice)
+
+    with capture_queries() as statements:
+        res = client.post('/api/sync', json=body, headers=alice)
+
+    assert len(res.json['chats']) == 10
+    assert len(statements) == 2
+
+
+def test_sync_rejects_bad_input(client, login):
+    """
+    GIVEN a logged-in user
+    WHEN the chats map is missing or has non-numeric ids
+    THEN a 400 should be returned.
+    """
+    alice = login('alice')
+
+    assert client.post('/api/sync', json={}, headers=alice).status_code == 400
+    assert client.post('/api/sync', json={'chats': {'abc': 1}}, headers=alice).status_code == 400
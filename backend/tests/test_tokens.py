@@ -0,0 +1,103 @@
+from flask_jwt_extended import create_access_token, decode_token
+from extensions import socketio
+
+
+def bearer(headers):
+    return headers['Authorization'].split(' ', 1)[1]
+
+
+def test_login_token_carries_hot_path_claims(app, login):
+    """
+    GIVEN a registered user
+    WHEN they log in
+    THEN the access token should carry their id, username and token version.
+    """
+    headers = login('alice')
+
+    with app.app_context():
+        claims = decode_token(bearer(headers))
+
+    assert claims['sub'] == '1'
+    assert claims['username'] == 'alice'
+    assert claims['ver'] == 0
+
+
+def test_revocation_check_is_cached(client, login, capture_queries):
+    """
+    GIVEN a logged-in user who already made one request
+    WHEN they make further requests
+    THEN the token version should not be read from the database again.
+    """
+    headers = login('alice')
+    client.get('/api/chats', headers=headers)
+
+    with capture_queries() as statements:
+        client.get('/api/chats', headers=headers)
+
+    assert not any('token_version' in s for s in statements)
+
+
+def test_deleted_account_token_is_rejected(client, login):
+    """
+    GIVEN a user who deleted their account
+    WHEN their old token is used again
+    THEN the request should be rejected as revoked.
+    """
+    headers = login('leaver')
+    client.get('/api/chats', headers=headers)
+
+    client.delete('/api/profile', headers=headers)
+
+    res = client.get('/api/chats', headers=headers)
+    assert res.status_code == 401
+
+
+def test_logout_all_revokes_issued_tokens(client, login):
+    """
+    GIVEN a user logged in on two devices
+    WHEN they log out everywhere and then log in again
+    THEN both old tokens should be rejected and the new one accepted.
+    """
+    first = login('alice')
+    second = login('alice')
+
+    assert client.post('/api/auth/logout-all', headers=first).status_code == 200
+
+    assert client.get('/api/chats', headers=first).status_code == 401
+    assert client.get('/api/chats', headers=second).status_code == 401
+
+    assert client.get('/api/chats', headers=login('alice')).status_code == 200
+
+
+def test_token_without_version_claim_is_accepted(client, app, login):
+    """
+    GIVEN a token issued before versioning (no `ver` claim)
+    WHEN it is used by an account that never revoked its tokens
+    THEN it should still be accepted.
+    """
+    login('veteran')
+    with app.app_context():
+        legacy = create_access_token(identity='1')
+
+    assert client.get('/api/profile', headers={'Authorization': f'Bearer {legacy}'}).status_code == 200
+
+
+def test_revocation_disconnects_open_sockets(client, login):
+    """
+    GIVEN Alice with a socket on each of two devices, Bob with one, and Carol with one
+    WHEN Alice logs out everywhere and Carol deletes her account
+    THEN Alice's and Carol's sockets should be closed and Bob's left open.
+    """
+    alice, bob, carol = login('alice'), login('bob'), login('carol')
+    sockets = {
+        name: socketio.test_client(client.application, auth={'token': bearer(headers)})
+        for name, headers in (('alice-1', alice), ('alice-2', alice), ('bob', bob), ('carol', carol))
+    }
+    assert all(socket.is_connected() for socket in sockets.values())
+
+    client.post('/api/auth/logout-all', headers=alice)
+    client.delete('/api/profile', headers=carol)
+
+    assert {name: socket.is_connected() for name, socket in sockets.items()} == {
+        'alice-1': False, 'alice-2': False, 'bob': True, 'carol': False,
+    }
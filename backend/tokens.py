@@ -0,0 +1,64 @@
+from collections import namedtuple
+from flask import current_app
+from flask_jwt_extended import create_access_token, get_jwt
+from cache import MISSING, TTLCache
+from extensions import db, jwt
+from models import User
+
+# What hot paths need about the caller, taken from the access token claims.
+TokenUser = namedtuple('TokenUser', ['id', 'username'])
+
+
+def issue_access_token(user):
+    """
+    Access token carrying the claims hot paths need (sub, username) and the
+    user's token_version, so revoking tokens never needs a token store.
+    """
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'username': user.username, 'ver': user.token_version}
+    )
+
+
+def get_current_user():
+    """Lightweight current user from the verified token. Use under @jwt_required()."""
+    claims = get_jwt()
+    return TokenUser(int(claims['sub']), claims.get('username'))
+
+
+# --- Revocation by token version ---
+# Maps user_id -> current token_version (None once the account is deleted).
+# Per process, like the membership cache: local changes invalidate it right
+# away; other processes pick them up within TOKEN_VERSION_CACHE_TTL.
+
+def init_token_versions(app):
+    app.extensions['token_versions'] = TTLCache(
+        maxsize=app.config['TOKEN_VERSION_CACHE_SIZE'],
+        ttl=app.config['TOKEN_VERSION_CACHE_TTL']
+    )
+
+
+def invalidate_token_version(user_id):
+    current_app.extensions['token_versions'].delete(user_id)
+
+
+def _current_token_version(user_id):
+    cache = current_app.extensions['token_versions']
+    version = cache.get(user_id)
+
+    if version is MISSING:
+        version = db.session.query(User.token_version).filter_by(id=user_id).scalar()
+        cache.set(user_id, version)
+
+    return version
+
+
+@jwt.token_in_blocklist_loader
+def is_token_revoked(jwt_header, jwt_payload):
+    """
+    Runs on every @jwt_required() request: rejects tokens of deleted accounts
+    and tokens issued before the user's last version bump. Tokens without a
+    `ver` claim (issued before versioning) count as version 0.
+    """
+    version = _current_token_version(int(jwt_payload['sub']))
+    return version is None or jwt_payload.get('ver', 0) != version
@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
 from extensions import db
-from models import User
+from cache import get_profile_cache, invalidate_membership
+from tokens import get_current_user, invalidate_token_version
+from conditional import make_etag, not_modified, with_etag
+from models import User, Chat
+from realtime import disconnect_user
 
 bp = Blueprint('users', __name__, url_prefix='/api')
 
@@ -39,7 +44,7 @@ def search_users():
               email:
                 type: string
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     query = request.args.get('q', '').strip()
 
     # Basic validation: ensure query looks like an email to avoid unnecessary DB calls
@@ -75,13 +80,20 @@ def delete_profile():
       404:
         description: User not found
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     user = db.session.get(User, current_user_id)
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
     try:
+        # Release the 1-on-1 pair keys: the partner keeps the history, but the chat
+        # must no longer match as a live direct chat (ids can be reused on SQLite).
+        Chat.query.filter(
+            or_(Chat.direct_low_id == user.id, Chat.direct_high_id == user.id)
+        ).update({'direct_low_id': None, 'direct_high_id': None}, synchronize_session=False)
+        # Member counts and group ownership are denormalized on the chats
+        Chat.forget_user(user.id)
         db.session.delete(user)
         db.session.commit()
     except Exception as e:
@@ -90,6 +102,12 @@ def delete_profile():
         print(f"Error deleting user: {e}")
         return jsonify({'error': 'Failed to delete account'}), 500
 
+    invalidate_membership(current_user_id)
+    get_profile_cache().invalidate(current_user_id)
+    # Outstanding tokens of the deleted account are rejected from the next request on
+    invalidate_token_version(current_user_id)
+    disconnect_user(current_user_id)
+
     return jsonify({'message': 'Account deleted successfully'}), 200
 
 
@@ -115,18 +133,21 @@ def get_profile():
               type: string
             email:
               type: string
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
-    current_user_id = int(get_jwt_identity())
-    user = db.session.get(User, current_user_id)
+    profile = get_profile_cache().get(get_current_user().id)
 
-    if not user:
+    if not profile:
         return jsonify({'error': 'User not found'}), 404
 
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email
-    }), 200
+    # The cached profile is the version marker: no query and no encoding on a match
+    etag = make_etag('profile', profile['id'], profile['username'], profile['email'])
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    return with_etag(jsonify(profile), etag), 200
 
 
 @bp.route('/profile', methods=['PUT'])
@@ -158,7 +179,7 @@ def update_profile():
       404:
         description: User not found
     """
-    current_user_id = int(get_jwt_identity())
+    current_user_id = get_current_user().id
     user = db.session.get(User, current_user_id)
 
     if not user:
@@ -177,6 +198,9 @@ def update_profile():
         user.email = new_email.strip()
 
     try:
+        if new_username:
+            # Partners' chat lists show this username: change their ETags
+            Chat.touch_members(Chat.chats_of(current_user_id))
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -186,6 +210,8 @@ def update_profile():
         print(f"Error updating profile: {e}")
         return jsonify({'error': 'Failed to update profile'}), 500
 
+    get_profile_cache().invalidate(current_user_id)
+
     return jsonify({
         'message': 'Profile updated successfully',
         'user': {
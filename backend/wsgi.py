@@ -0,0 +1,11 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker model, concurrency and keep-alive are configured from the environment
+in gunicorn.conf.py.
+"""
+from app import create_app
+
+app = create_app()
@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import PropTypes from 'prop-types';
 import { toast } from 'react-hot-toast';
 import chatService from '../../services/chatService';
+import { getSocket } from '../../services/socket';
 import { useAuth } from '../../context/AuthContext';
 import { DELETED_USER } from '../../utils/constants';
 
@@ -10,6 +11,12 @@ import ChatHeader from './ChatHeader';
 import MessageList from './MessageList';
 import MessageInput from './MessageInput';
 
+// Long-poll hold time in seconds (server caps it at LONG_POLL_MAX_WAIT)
+const LONG_POLL_WAIT = 25;
+const POLL_RETRY_DELAY = 3000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
 const ChatWindow = ({ activeChat }) => {
     const [messages, setMessages] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -19,37 +26,50 @@ const ChatWindow = ({ activeChat }) => {
     const [hasMore, setHasMore] = useState(true);
 
     const lastIdRef = useRef(0);
+    const historyLoadedRef = useRef(false);
+    const lastReadRef = useRef(0);
     const { user: currentUser } = useAuth();
 
     const chatId = activeChat?.id;
     const rawPartnerId = activeChat?.partnerId;
     const resolvedPartnerId = rawPartnerId || DELETED_USER.id;
 
-    // --- Lifecycle: Load & Poll ---
+    // --- Lifecycle: Load, Subscribe & Poll (fallback) ---
     useEffect(() => {
         if (!chatId) return;
 
         let isMounted = true;
-        let intervalId = null;
+        const socket = getSocket();
 
         setLoading(true);
         setMessages([]);
         setHasMore(true);
         lastIdRef.current = 0;
+        historyLoadedRef.current = false;
+
+        const appendMessages = (newMsgs) => {
+            setMessages(prev => {
+                const existingIds = new Set(prev.map(m => m.id));
+                const uniqueNewMsgs = newMsgs.filter(m => !existingIds.has(m.id));
+                return [...prev, ...uniqueNewMsgs];
+            });
+            const newestId = newMsgs[newMsgs.length - 1].id;
+            if (newestId > lastIdRef.current) lastIdRef.current = newestId;
+        };
 
         const loadInitialHistory = async () => {
             try {
-                const data = await chatService.getMessages(chatId, { limit: 50 });
+                const page = await chatService.getMessagesPage(chatId, { limit: 50 });
 
                 if (isMounted) {
-                    const msgs = Array.isArray(data) ? data : [];
+                    const msgs = page.messages;
                     setMessages(msgs);
-
-                    if (msgs.length < 50) setHasMore(false);
+                    setHasMore(page.hasMore);
 
                     if (msgs.length > 0) {
                         lastIdRef.current = msgs[msgs.length - 1].id;
                     }
+                    historyLoadedRef.current = true;
                     setLoading(false);
                 }
             } catch (error) {
@@ -58,34 +78,92 @@ const ChatWindow = ({ activeChat }) => {
             }
         };
 
-        const pollNewMessages = async () => {
+        // Returns false if the request failed, so the fallback loop can back off.
+        const pollNewMessages = async (wait = 0) => {
             try {
-                const newMsgs = await chatService.getMessages(chatId, {
-                    after_id: lastIdRef.current
-                });
-
-                if (isMounted && Array.isArray(newMsgs) && newMsgs.length > 0) {
-                    setMessages(prev => {
-                        const existingIds = new Set(prev.map(m => m.id));
-                        const uniqueNewMsgs = newMsgs.filter(m => !existingIds.has(m.id));
-                        return [...prev, ...uniqueNewMsgs];
+                // Server caps each page; keep following the cursor until caught up
+                let page;
+                do {
+                    page = await chatService.getMessagesPage(chatId, {
+                        after_id: lastIdRef.current,
+                        ...(wait ? { wait } : {})
                     });
-                    lastIdRef.current = newMsgs[newMsgs.length - 1].id;
-                }
+
+                    if (!isMounted) return true;
+                    if (page.messages.length > 0) appendMessages(page.messages);
+                } while (page.hasMore);
+                return true;
             } catch (error) {
                 // Silent fail for polling
+                return false;
+            }
+        };
+
+        // Fallback while the socket is down: long polling holds one request open
+        // until a message arrives (or LONG_POLL_WAIT expires) instead of polling on a timer.
+        const runFallbackPolling = async () => {
+            while (isMounted) {
+                if (!socket.connected && historyLoadedRef.current) {
+                    const ok = await pollNewMessages(LONG_POLL_WAIT);
+                    if (!ok) await sleep(POLL_RETRY_DELAY);
+                } else {
+                    await sleep(POLL_RETRY_DELAY);
+                }
             }
         };
 
+        // --- Real-time events ---
+        const handleConnect = () => {
+            socket.emit('join_chat', { chat_id: chatId });
+            // Catch up on anything sent while the socket was down
+            if (historyLoadedRef.current) pollNewMessages();
+        };
+
+        const handleNewMessage = (msg) => {
+            if (isMounted && msg.chat_id === chatId) appendMessages([msg]);
+        };
+
+        const handleMessageEdited = (msg) => {
+            if (!isMounted || msg.chat_id !== chatId) return;
+            setMessages(prev => prev.map(m => (m.id === msg.id ? msg : m)));
+        };
+
+        const handleMessageDeleted = ({ id, chat_id }) => {
+            if (!isMounted || chat_id !== chatId) return;
+            setMessages(prev => prev.filter(m => m.id !== id));
+        };
+
+        socket.on('connect', handleConnect);
+        socket.on('new_message', handleNewMessage);
+        socket.on('message_edited', handleMessageEdited);
+        socket.on('message_deleted', handleMessageDeleted);
+        if (socket.connected) socket.emit('join_chat', { chat_id: chatId });
+
         loadInitialHistory();
-        intervalId = setInterval(pollNewMessages, 3000);
+        runFallbackPolling();
 
         return () => {
             isMounted = false;
-            clearInterval(intervalId);
+            socket.emit('leave_chat', { chat_id: chatId });
+            socket.off('connect', handleConnect);
+            socket.off('new_message', handleNewMessage);
+            socket.off('message_edited', handleMessageEdited);
+            socket.off('message_deleted', handleMessageDeleted);
         };
     }, [chatId]);
 
+    // --- Read state: the open chat counts as read up to its newest message ---
+    useEffect(() => {
+        if (!chatId || messages.length === 0) return;
+        const newestId = messages[messages.length - 1].id;
+        if (newestId <= lastReadRef.current) return;
+
+        lastReadRef.current = newestId;
+        chatService.markRead(chatId, newestId).catch(() => {
+            // Non-critical: the badge is corrected on the next read
+        });
+    }, [chatId, messages]);
+
     // --- Pagination Handler ---
     const handleLoadOlderMessages = async () => {
         if (!hasMore || isFetchingOld || messages.length === 0) return;
@@ -95,14 +173,14 @@ const ChatWindow = ({ activeChat }) => {
         try {
             const oldestId = messages[0].id;
 
-            const olderMsgs = await chatService.getMessages(chatId, {
+            const page = await chatService.getMessagesPage(chatId, {
                 limit: 50,
                 before_id: oldestId
             });
+            const olderMsgs = page.messages;
 
-            if (olderMsgs.length < 50) {
-                setHasMore(false);
-            }
+            // Server tells us whether older pages remain, no extra round trip needed
+            setHasMore(page.hasMore);
 
             if (olderMsgs.length > 0) {
                 setMessages(prev => {
@@ -133,8 +211,10 @@ const ChatWindow = ({ activeChat }) => {
         try {
             const response = await chatService.sendMessage(chatId, content);
             if (response && response.id) {
-                setMessages(prev => [...prev, response]);
-                lastIdRef.current = response.id;
+                setMessages(prev => (
+                    prev.some(m => m.id === response.id) ? prev : [...prev, response]
+                ));
+                if (response.id > lastIdRef.current) lastIdRef.current = response.id;
             }
         } catch (error) {
             console.error(error);
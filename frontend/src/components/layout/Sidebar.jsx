@@ -14,6 +14,8 @@ import NewChatModal from './NewChatModal';
 
 const Sidebar = ({ onChatSelect, onUserSelect }) => {
     const [chats, setChats] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
 
     // Local Filter State
     const [filterQuery, setFilterQuery] = useState('');
@@ -25,23 +27,49 @@ const Sidebar = ({ onChatSelect, onUserSelect }) => {
     const { user: currentUser, logout } = useAuth();
     const { cacheUsers } = useUsers();
 
-    // 1. Fetch Chats Logic
+    const cacheParticipants = (chatList) => {
+        const allParticipants = chatList.flatMap(c => c.participants || []);
+        const validParticipants = allParticipants.filter(p => p && p.id);
+        if (validParticipants.length > 0) {
+            cacheUsers(validParticipants);
+        }
+    };
+
+    // 1. Fetch Chats Logic (first page; older chats load on scroll)
     const fetchChats = async () => {
         try {
-            const data = await chatService.getAllChats();
-            const chatList = Array.isArray(data) ? data : [];
-            setChats(chatList);
-
-            const allParticipants = chatList.flatMap(c => c.participants || []);
-            const validParticipants = allParticipants.filter(p => p && p.id);
-            if (validParticipants.length > 0) {
-                cacheUsers(validParticipants);
-            }
+            const page = await chatService.getChatsPage();
+            setChats(page.chats);
+            setNextCursor(page.hasMore ? page.nextCursor : null);
+            cacheParticipants(page.chats);
         } catch (error) {
             console.error("[Sidebar] Failed to load chats", error);
         }
     };
 
+    const fetchMoreChats = async () => {
+        if (!nextCursor || isLoadingMore) return;
+        setIsLoadingMore(true);
+        try {
+            const page = await chatService.getChatsPage({ cursor: nextCursor });
+            setChats(prev => {
+                const existingIds = new Set(prev.map(c => c.id));
+                return [...prev, ...page.chats.filter(c => !existingIds.has(c.id))];
+            });
+            setNextCursor(page.hasMore ? page.nextCursor : null);
+            cacheParticipants(page.chats);
+        } catch (error) {
+            console.error("[Sidebar] Failed to load more chats", error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    const handleListScroll = (e) => {
+        const { scrollTop, scrollHeight, clientHeight } = e.currentTarget;
+        if (scrollHeight - scrollTop - clientHeight < 100) fetchMoreChats();
+    };
+
     useEffect(() => {
         if (currentUser) fetchChats();
     }, [currentUser, cacheUsers]);
@@ -49,11 +77,16 @@ const Sidebar = ({ onChatSelect, onUserSelect }) => {
 
     // 2. Local Filter Logic
     const filteredChats = chats.filter(chat => {
-        const partner = getChatPartner(chat, currentUser);
-        const name = partner.username || '';
+        const name = chat.is_group ? chat.name : (getChatPartner(chat, currentUser).username || '');
         return name.toLowerCase().includes(filterQuery.toLowerCase());
     });
 
+    // Opening a chat reads it; the server is updated by ChatWindow
+    const handleChatSelect = (chat) => {
+        setChats(prev => prev.map(c => (c.id === chat.id ? { ...c, unread_count: 0 } : c)));
+        onChatSelect(chat);
+    };
+
     // 3. Handle new chat
     const handleChatCreated = (newChat) => {
         fetchChats();
@@ -115,13 +148,25 @@ const Sidebar = ({ onChatSelect, onUserSelect }) => {
             </div>
 
             {/* List Content */}
-            <div className="flex-1 overflow-y-auto">
+            <div className="flex-1 overflow-y-auto" onScroll={handleListScroll}>
                 {filteredChats.length === 0 ? (
                     <div className="p-8 text-center text-gray-400 text-sm">
                         {filterQuery ? 'No chats found' : 'No chats yet'}
                     </div>
                 ) : (
                     filteredChats.map(chat => {
+                        if (chat.is_group) {
+                            return (
+                                <SidebarItem
+                                    key={chat.id}
+                                    title={chat.name}
+                                    subText={chat.last_message?.content || `${chat.member_count} members`}
+                                    badge={chat.unread_count || 0}
+                                    onClick={() => handleChatSelect(chat)}
+                                />
+                            );
+                        }
+
                         const partner = getChatPartner(chat, currentUser);
                         const displayId = partner.id || DELETED_USER.id;
 
@@ -129,8 +174,9 @@ const Sidebar = ({ onChatSelect, onUserSelect }) => {
                             <SidebarItem
                                 key={chat.id}
                                 userId={displayId}
-                                subText={'Click to view messages'}
-                                onClick={() => onChatSelect(chat)}
+                                subText={chat.last_message?.content || 'No messages yet'}
+                                badge={chat.unread_count || 0}
+                                onClick={() => handleChatSelect(chat)}
                             />
                         );
                     })
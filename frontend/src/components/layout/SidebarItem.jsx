@@ -2,13 +2,16 @@ import PropTypes from 'prop-types';
 import { useUsers } from '../../context/UsersContext';
 import { DELETED_USER } from '../../utils/constants';
 
-const SidebarItem = ({ userId, subText, onClick, isActive }) => {
+const SidebarItem = ({ userId, title, subText, badge, onClick, isActive }) => {
     const { getUser } = useUsers();
 
     const realUser = getUser(userId);
 
-    // Fallback to Deleted User if ID exists but user not found
-    const displayUser = realUser || (userId ? DELETED_USER : null);
+    // Group chats pass their own title; otherwise show the user,
+    // falling back to Deleted User if ID exists but user not found
+    const displayUser = title
+        ? { username: title }
+        : realUser || (userId ? DELETED_USER : null);
 
     if (!displayUser) return null; // Or render a skeleton loader
 
@@ -38,6 +41,11 @@ const SidebarItem = ({ userId, subText, onClick, isActive }) => {
                     <p className={`font-medium truncate ${isActive ? 'text-blue-700' : (isDeleted ? 'text-gray-400 italic' : 'text-gray-900')}`}>
                         {displayUser.username}
                     </p>
+                    {badge > 0 && (
+                        <span className="ml-2 px-2 py-0.5 text-xs font-semibold text-white bg-blue-600 rounded-full shrink-0">
+                            {badge > 99 ? '99+' : badge}
+                        </span>
+                    )}
                 </div>
                 <p className="text-xs text-gray-500 truncate">
                     {subText || displayUser.email}
@@ -48,8 +56,10 @@ const SidebarItem = ({ userId, subText, onClick, isActive }) => {
 };
 
 SidebarItem.propTypes = {
-    userId: PropTypes.number.isRequired,
+    userId: PropTypes.number,
+    title: PropTypes.string,
     subText: PropTypes.string,
+    badge: PropTypes.number,
     onClick: PropTypes.func.isRequired,
     isActive: PropTypes.bool,
 };
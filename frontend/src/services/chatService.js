@@ -34,6 +34,23 @@ const chatService = {
         return data.map(chat => _normalizeChat(chat));
     },
 
+    /**
+     * Fetch one page of the chat list (most recently active first).
+     * @param {Object} params
+     * @param {number} [params.limit] - Page size (server default 50)
+     * @param {string} [params.cursor] - nextCursor of the previous page
+     * @returns {Promise<{chats: Array, hasMore: boolean, nextCursor: string|null}>}
+     */
+    getChatsPage: async (params = {}) => {
+        const response = await api.get('/chats', { params });
+        const data = Array.isArray(response.data) ? response.data : [];
+        return {
+            chats: data.map(chat => _normalizeChat(chat)),
+            hasMore: response.headers['x-has-more'] === 'true',
+            nextCursor: response.headers['x-next-cursor'] || null
+        };
+    },
+
     createChat: async (recipientId) => {
         const response = await api.post('/chats', { recipient_id: recipientId });
         const data = response.data;
@@ -55,6 +72,7 @@ const chatService = {
      * @param {number} [params.limit=50] - Number of messages to fetch
      * @param {number} [params.after_id] - Fetch messages newer than ID (Polling)
      * @param {number} [params.before_id] - Fetch messages older than ID (Pagination)
+     * @param {number} [params.wait] - With after_id: hold the request open up to N seconds (Long polling)
      */
     getMessages: async (chatId, params = {}) => {
         if (!chatId) return [];
@@ -62,6 +80,45 @@ const chatService = {
         return response.data;
     },
 
+    /**
+     * Fetch one history page together with the server's pagination hints.
+     * @param {number} chatId
+     * @param {Object} params - Same params as getMessages
+     * @returns {Promise<{messages: Array, hasMore: boolean, nextCursor: number|null}>}
+     */
+    getMessagesPage: async (chatId, params = {}) => {
+        if (!chatId) return { messages: [], hasMore: false, nextCursor: null };
+        const response = await api.get(`/chats/${chatId}/messages`, { params });
+        const cursor = response.headers['x-next-cursor'];
+        return {
+            messages: Array.isArray(response.data) ? response.data : [],
+            hasMore: response.headers['x-has-more'] === 'true',
+            nextCursor: cursor ? Number(cursor) : null
+        };
+    },
+
+    /**
+     * Mark a chat as read up to a message (defaults to the newest one).
+     * @returns {Promise<{chat_id: number, last_read_message_id: number|null, unread_count: number}>}
+     */
+    markRead: async (chatId, messageId) => {
+        const body = messageId ? { message_id: messageId } : {};
+        const response = await api.post(`/chats/${chatId}/read`, body);
+        return response.data;
+    },
+
+    /**
+     * Catch up on several chats in one request (e.g. after the connection comes back).
+     * @param {Object<number, number>} lastSeen - Map of chatId -> newest message id the client has (0 for none)
+     * @param {number} [limit] - Messages per chat (server default 50)
+     * @returns {Promise<{chats: Object<string, {messages: Array, has_more: boolean, next_cursor: number}>, denied: number[]}>}
+     */
+    sync: async (lastSeen, limit) => {
+        const body = limit ? { chats: lastSeen, limit } : { chats: lastSeen };
+        const response = await api.post('/sync', body);
+        return response.data;
+    },
+
     sendMessage: async (chatId, content) => {
         const response = await api.post(`/chats/${chatId}/messages`, { content });
         return response.data;
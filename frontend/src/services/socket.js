@@ -0,0 +1,30 @@
+import { io } from 'socket.io-client';
+
+// Same origin as the REST API, without the /api prefix
+const SOCKET_URL = 'http://localhost:5000';
+
+let socket = null;
+
+/**
+ * Returns the shared Socket.IO connection, creating it on first use.
+ * The JWT is sent in the handshake auth payload and re-read on every
+ * reconnect so a fresh login is picked up automatically.
+ */
+export const getSocket = () => {
+    if (!socket) {
+        socket = io(SOCKET_URL, {
+            auth: (cb) => cb({ token: localStorage.getItem('token') }),
+            transports: ['websocket', 'polling'],
+        });
+    }
+    return socket;
+};
+
+export const disconnectSocket = () => {
+    if (socket) {
+        socket.disconnect();
+        socket = null;
+    }
+};
+
+export default getSocket;